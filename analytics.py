@@ -0,0 +1,224 @@
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # optional: /stats falls back to the leaderboard panels only
+    np = None
+
+from leaderboard import PLAYER_TOTALS_QUERY, TEAM_NAMES_QUERY
+
+RESULTS_QUERY = """
+    SELECT M.match_id, M.match_date, M.home_team_id, M.away_team_id, MR.winner_team_id
+    FROM MATCH_RESULTS MR
+    JOIN MATCHES M ON MR.match_id = M.match_id
+    ORDER BY M.match_date, M.match_id;
+"""
+
+# Frame -> tables whose writes make it stale.
+FRAME_SOURCES = {
+    'players': ('PLAYER_STATS', 'PLAYERS', 'TEAMS'),
+    'results': ('MATCH_RESULTS', 'MATCHES', 'TEAMS'),
+}
+
+FORM_WINDOW = 5
+PERCENTILES = (50, 75, 90, 99)
+
+
+def available():
+    return np is not None
+
+
+class PlayerFrame:
+    """Per-player totals as parallel arrays (one row per player)."""
+
+    def __init__(self, rows, team_names):
+        self.names = [r[1] for r in rows]
+        self.team_id = np.array([r[2] if r[2] is not None else -1 for r in rows], dtype=np.int64)
+        self.runs = np.array([r[3] for r in rows], dtype=np.int64)
+        self.wickets = np.array([r[4] for r in rows], dtype=np.int64)
+        self.boundaries = np.array([r[5] for r in rows], dtype=np.int64)
+        self.team_names = team_names
+
+
+class ResultFrame:
+    """One row per MATCH_RESULTS row in date order; team ids mapped to 0..T-1.
+
+    Matches missing a home or away team (nullable columns) are left out.
+    """
+
+    def __init__(self, rows, team_names):
+        rows = [r for r in rows if r[2] is not None and r[3] is not None]
+        team_ids = sorted(set(team_names) | {r[2] for r in rows} | {r[3] for r in rows})
+        self.team_ids = np.array(team_ids, dtype=np.int64)
+        self.team_names = [team_names.get(t, f"Team {t}") for t in team_ids]
+        index = {t: i for i, t in enumerate(team_ids)}
+        self.home = np.array([index[r[2]] for r in rows], dtype=np.int64)
+        self.away = np.array([index[r[3]] for r in rows], dtype=np.int64)
+        # -1 marks a tie / no result.
+        self.winner = np.array([index.get(r[4], -1) if r[4] is not None else -1 for r in rows], dtype=np.int64)
+
+
+class Analytics:
+    """Columnar copies of PLAYER_STATS and MATCH_RESULTS with vectorized metrics.
+
+    Each frame is loaded with one query and kept until a write to one of its
+    FRAME_SOURCES tables marks it stale; only stale frames are reloaded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames = {}
+        self._versions = dict.fromkeys(FRAME_SOURCES, 0)
+
+    def invalidate(self, table_name):
+        table_name = table_name.upper()
+        with self._lock:
+            for frame, tables in FRAME_SOURCES.items():
+                if table_name in tables:
+                    self._frames.pop(frame, None)
+                    self._versions[frame] += 1
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            for frame in self._versions:
+                self._versions[frame] += 1
+
+    def frames(self, connect):
+        """(PlayerFrame, ResultFrame), reloading missing ones through ``connect``."""
+        with self._lock:
+            frames = dict(self._frames)
+            versions = dict(self._versions)
+        missing = [f for f in FRAME_SOURCES if f not in frames]
+        if missing:
+            conn = connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(TEAM_NAMES_QUERY)
+                team_names = dict(cursor.fetchall())
+                for name in missing:
+                    if name == 'players':
+                        cursor.execute(PLAYER_TOTALS_QUERY)
+                        frames[name] = PlayerFrame(cursor.fetchall(), team_names)
+                    else:
+                        cursor.execute(RESULTS_QUERY)
+                        frames[name] = ResultFrame(cursor.fetchall(), team_names)
+                cursor.close()
+            finally:
+                conn.close()
+            with self._lock:
+                for name in missing:
+                    if self._versions[name] == versions[name]:
+                        self._frames[name] = frames[name]
+        return frames['players'], frames['results']
+
+    def panels(self, connect, top=5):
+        players, results = self.frames(connect)
+        return {
+            'team_records': team_records(results),
+            'rivalries': rivalries(results, top),
+            'home_win_rate': home_win_rate(results),
+            'player_percentiles': player_percentiles(players),
+            'runs_per_match': runs_per_team_match(players, results, top),
+        }
+
+
+# ---- metrics ----
+def team_outcomes(results):
+    """played, wins, ties per team index (bincount over both sides of every match)."""
+    n = len(results.team_ids)
+    sides = np.concatenate([results.home, results.away])
+    played = np.bincount(sides, minlength=n)
+    wins = np.bincount(results.winner[results.winner >= 0], minlength=n)
+    ties = np.bincount(sides[np.concatenate([results.winner, results.winner]) < 0], minlength=n)
+    return played, wins, ties
+
+
+def team_form(results, window=FORM_WINDOW):
+    """Last ``window`` results per team as 'W'/'L'/'T', oldest first."""
+    n = len(results.team_ids)
+    if not len(results.home):
+        return [''] * n
+    order = np.arange(len(results.home))
+    teams = np.concatenate([results.home, results.away])
+    when = np.concatenate([order, order])
+    winner = np.concatenate([results.winner, results.winner])
+    outcome = np.where(winner < 0, 'T', np.where(winner == teams, 'W', 'L'))
+    # Sort by team, then by match order; each team's last ``window`` rows are its form.
+    idx = np.lexsort((when, teams))
+    teams, outcome = teams[idx], outcome[idx]
+    ends = np.searchsorted(teams, np.arange(n), side='right')
+    starts = np.searchsorted(teams, np.arange(n), side='left')
+    return [''.join(outcome[max(s, e - window):e]) for s, e in zip(starts, ends)]
+
+
+def team_records(results):
+    played, wins, ties = team_outcomes(results)
+    losses = played - wins - ties
+    with np.errstate(invalid='ignore', divide='ignore'):
+        win_pct = np.where(played > 0, 100.0 * wins / played, 0.0)
+    form = team_form(results)
+    order = np.lexsort((-wins, -win_pct))
+    return [{'team': results.team_names[i], 'played': int(played[i]), 'wins': int(wins[i]),
+             'losses': int(losses[i]), 'ties': int(ties[i]), 'win_pct': round(float(win_pct[i]), 1),
+             'form': form[i]}
+            for i in order if played[i]]
+
+
+def rivalries(results, top=5):
+    """Most-played pairings with each side's wins (team-vs-team matrix)."""
+    n = len(results.team_ids)
+    if not len(results.home):
+        return []
+    low, high = np.minimum(results.home, results.away), np.maximum(results.home, results.away)
+    played = np.zeros((n, n), dtype=np.int64)
+    np.add.at(played, (low, high), 1)
+    wins = np.zeros((n, n), dtype=np.int64)
+    decided = results.winner >= 0
+    loser = np.where(results.winner == results.home, results.away, results.home)
+    np.add.at(wins, (results.winner[decided], loser[decided]), 1)
+    flat = np.argsort(played, axis=None)[::-1][:top]
+    pairs = []
+    for a, b in zip(*np.unravel_index(flat, played.shape)):
+        if played[a, b] == 0:
+            break
+        pairs.append({'team': results.team_names[a], 'opponent': results.team_names[b],
+                      'played': int(played[a, b]), 'wins': int(wins[a, b]), 'opponent_wins': int(wins[b, a])})
+    return pairs
+
+
+def home_win_rate(results):
+    decided = results.winner >= 0
+    if not decided.any():
+        return None
+    return round(100.0 * float(np.mean(results.winner[decided] == results.home[decided])), 1)
+
+
+def player_percentiles(players):
+    """Runs / wickets / boundaries needed to reach each of PERCENTILES."""
+    if not len(players.runs):
+        return []
+    values = {f: np.percentile(getattr(players, f), PERCENTILES) for f in ('runs', 'wickets', 'boundaries')}
+    return [{'percentile': p, **{f: round(float(v[i]), 1) for f, v in values.items()}}
+            for i, p in enumerate(PERCENTILES)]
+
+
+def runs_per_team_match(players, results, top=5):
+    """Players ranked by runs per match their team has played.
+
+    PLAYER_STATS has no per-match appearances (or balls faced, so no strike
+    rate); the team's match count is the closest denominator available.
+    """
+    if not len(players.runs) or not len(results.team_ids):
+        return []
+    played, _, _ = team_outcomes(results)
+    slot = np.searchsorted(results.team_ids, players.team_id)
+    slot = np.clip(slot, 0, len(results.team_ids) - 1)
+    known = results.team_ids[slot] == players.team_id
+    matches = np.where(known, played[slot], 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = np.where(matches > 0, players.runs / np.maximum(matches, 1), 0.0)
+    best = np.argsort(-average, kind='stable')[:top]
+    return [{'player': players.names[i], 'runs': int(players.runs[i]), 'matches': int(matches[i]),
+             'average': round(float(average[i]), 2)}
+            for i in best if matches[i]]
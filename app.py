@@ -1,47 +1,405 @@
-from flask import Flask, render_template, request, redirect, session, url_for
+import atexit
+import click
+import csv
+from flask import Flask, render_template, request, redirect, session, url_for, g, jsonify, Response, stream_with_context, has_request_context
+from werkzeug.datastructures import FileStorage
 import mysql.connector
 import traceback
-import re
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from analytics import FRAME_SOURCES, Analytics, available as analytics_available
+from auth import RoleCache, ServerSessionInterface
+from bulk import ImportReport, import_records, read_records
+from cache import AggregateCache, FileCache, private_directory
+from db_pool import ConnectionPool
+from export import export_response
+from fanout import run_parallel, with_cursor
+from ingest import BallIngestor
+from leaderboard import Leaderboard
+from metrics import Metrics
+from page_cache import PageCache, cached_response, decode_page, encode_page
+from paging import fetch_page, slice_page, decode_token, iter_rows
+from query_guard import RowStream, estimate_rows, is_select, with_time_limit
+from records import fetch_records, from_dict
+from routing import ReplicaRouter, parse_address, parse_addresses, replica_lag
+from schema import SchemaRegistry, is_ddl, is_read_only
+from search import SEARCH_FIELDS, SearchIndex
+from standings import apply_result_changes, nrr_enabled, rebuild as rebuild_standings, verify as verify_standings
+from views import VIEW_KEYS, VIEW_QUERIES, VIEW_SOURCES, ViewStore, fetch_view_page
 
 app = Flask(__name__)
 app.secret_key = "supersecretkey"
 
+# Writes (and logins) go to the primary; reads may go to DB_REPLICA_HOSTS
+# ("host:port,host:port"). Both default to the old single localhost server.
+DB_HOST, DB_PORT = parse_address(os.environ.get("DB_PRIMARY_HOST", "localhost"))
+DB_NAME = "cricket_league"
+
+# Route/SQL timings for /metrics; statements slower than SLOW_QUERY_SECONDS are logged.
+metrics = Metrics(slow_query_seconds=float(os.environ.get("SLOW_QUERY_SECONDS", 0.5)))
+
+# /query and /query/export statements are timed under this one label: their text can hold anything.
+ADHOC_SQL_LABEL = "ad-hoc /query"
+
+# Fraction of requests run under cProfile (0 disables); results go to the 'cricket.profile' log.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+profile_lock = threading.Lock()
+
+# One bounded pool per (user, database); connections survive across requests.
+pool = ConnectionPool(
+    max_size=int(os.environ.get("POOL_SIZE", 5)),
+    idle_timeout=float(os.environ.get("POOL_IDLE_TIMEOUT", 300)),
+    wait_timeout=float(os.environ.get("POOL_WAIT_TIMEOUT", 10)),
+    ping_interval=float(os.environ.get("POOL_PING_INTERVAL", 5)),
+    sweep_interval=float(os.environ.get("POOL_SWEEP_INTERVAL", 60)),
+    cursor_wrapper=metrics.instrument,
+    consume_results=True,
+)
+
+atexit.register(pool.close_all)
+
+# Replicas lagging more than REPLICA_MAX_LAG seconds, or down, are skipped; a session
+# reads from the primary for STICKY_SECONDS after it writes (read-your-writes).
+router = ReplicaRouter(
+    parse_addresses(os.environ.get("DB_REPLICA_HOSTS")),
+    max_lag=float(os.environ.get("REPLICA_MAX_LAG", 5)),
+    check_interval=float(os.environ.get("REPLICA_CHECK_INTERVAL", 5)),
+    down_backoff=float(os.environ.get("REPLICA_DOWN_BACKOFF", 30)),
+)
+STICKY_SECONDS = float(os.environ.get("STICKY_SECONDS", 10))
+
+# With CACHE_DIR set (ideally on tmpfs, e.g. /dev/shm/cricket-league) the aggregate
+# and page caches live in files shared by every worker process instead of per process.
+CACHE_DIR = os.environ.get("CACHE_DIR")
+AGGREGATE_CACHE_TTL = float(os.environ.get("AGGREGATE_CACHE_TTL", 300))
+AGGREGATE_CACHE_SIZE = int(os.environ.get("AGGREGATE_CACHE_SIZE", 256))
+PAGE_CACHE_TTL = float(os.environ.get("PAGE_CACHE_TTL", 60))
+PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", 512))
+
+def make_cache(name, ttl, max_entries, cache_dir=CACHE_DIR, encode=None, decode=None):
+    if cache_dir:
+        return FileCache(os.path.join(private_directory(cache_dir), name), ttl=ttl, max_entries=max_entries,
+                         encode=encode, decode=decode)
+    return AggregateCache(ttl=ttl, max_entries=max_entries)
+
+def make_aggregate_cache(cache_dir=CACHE_DIR):
+    # Only Leaderboards are stored here.
+    return make_cache('aggregate', AGGREGATE_CACHE_TTL, AGGREGATE_CACHE_SIZE, cache_dir,
+                      encode=Leaderboard.to_json, decode=Leaderboard.from_json)
+
+def make_page_cache(cache_dir=CACHE_DIR):
+    return PageCache(make_cache('pages', PAGE_CACHE_TTL, PAGE_CACHE_SIZE, cache_dir,
+                                encode=encode_page, decode=decode_page))
+
+# Logins: the cookie holds an opaque session id plus the pad that unseals the password;
+# user, role and the sealed password stay server-side. A repeat login within
+# ROLE_CACHE_TTL seconds skips the database.
+SESSION_TTL = float(os.environ.get("SESSION_TTL", 8 * 3600))
+SESSION_MAX = int(os.environ.get("SESSION_MAX", 10000))
+app.session_interface = ServerSessionInterface(make_cache('sessions', SESSION_TTL, SESSION_MAX))
+role_cache = RoleCache(ttl=float(os.environ.get("ROLE_CACHE_TTL", 300)))
+
+# Leaderboards and table lists, dropped whenever one of our routes writes to a source table.
+aggregate_cache = make_aggregate_cache()
+
+# Column metadata for every table, loaded in one information_schema query.
+schema_registry = SchemaRegistry(DB_NAME, max_age=float(os.environ.get("SCHEMA_MAX_AGE", 600)))
+
+# Materialized snapshots of the joined /viewdb queries.
+view_store = ViewStore(
+    max_rows=int(os.environ.get("VIEW_MAX_ROWS", 20000)),
+    max_age=float(os.environ.get("VIEW_MAX_AGE", 300)),
+)
+
+# Rendered dashboard/viewdb pages for viewers, who all see the same output.
+page_cache = make_page_cache()
+
+# How many players/teams each leaderboard shows.
+LEADERBOARD_SIZE = int(os.environ.get("LEADERBOARD_SIZE", 10))
+
+# Keyset page size for table browsing, and how many template events a stream buffers per chunk.
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", 100))
+MAX_PAGE_SIZE = 1000
+STREAM_BUFFER = 100
+
+# Seconds a page waits for its parallel queries before rendering whatever has arrived.
+FANOUT_DEADLINE = float(os.environ.get("FANOUT_DEADLINE", 5))
+
+# /query limits: server-side SELECT timeout, rows returned, and EXPLAIN row estimates
+# above which a query is flagged or refused outright.
+QUERY_MAX_EXECUTION_MS = int(os.environ.get("QUERY_MAX_EXECUTION_MS", 10000))
+QUERY_ROW_CAP = int(os.environ.get("QUERY_ROW_CAP", 5000))
+QUERY_WARN_ROWS = int(os.environ.get("QUERY_WARN_ROWS", 1000000))
+QUERY_REFUSE_ROWS = int(os.environ.get("QUERY_REFUSE_ROWS", 100000000))
+
+# Most rows one batch update/delete (and its select page) handles.
+MAX_BATCH = int(os.environ.get("MAX_BATCH", 500))
+
+# Rows per INSERT/commit for bulk imports.
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 500))
+
+# Columnar PLAYER_STATS / MATCH_RESULTS frames behind the extra /stats panels (needs numpy).
+analytics = Analytics()
+
+# Prefix/trigram index over player, team, coach, venue and city names for /search.
+search_index = SearchIndex()
+SEARCH_LIMIT = 20
+
+def service_connect():
+    # Timer-driven ingest flushes run outside any request, so they use the DB_USER service account.
+    return pool.acquire(DB_HOST, os.environ["DB_USER"], os.environ.get("DB_PASSWORD", ""), DB_NAME, port=DB_PORT)
+
+# Ball-by-ball events are folded into PLAYER_STATS once this many are buffered,
+# or once the oldest has waited INGEST_FLUSH_INTERVAL seconds (without DB_USER,
+# overdue events wait for the next /ingest request instead of a timer).
+ingestor = BallIngestor(
+    flush_size=int(os.environ.get("INGEST_FLUSH_SIZE", 500)),
+    flush_interval=float(os.environ.get("INGEST_FLUSH_INTERVAL", 5)),
+    max_buffer=int(os.environ.get("INGEST_MAX_BUFFER", 50000)),
+    on_flush=lambda table_name: invalidate_table(table_name),
+    on_schema=lambda: invalidate_schema(),
+    connect=service_connect if os.environ.get("DB_USER") else None,
+)
+
 # ------------------- Helper -------------------
-def get_connection(db=True):
+def connector(read=False, db=True):
+    """Zero-argument function that opens a pooled connection for this session's user.
+
+    With ``read`` it goes to a healthy replica unless the session wrote
+    recently or the request is filling a shared cache (a lagging replica
+    would put stale data in front of every user, the writer included); if
+    the replica can't be reached it falls back to the primary. The
+    credentials are bound now, so worker threads may call it.
+    """
+    user, password = session['user'], session.password
+    database = DB_NAME if db else None
+    address = None
+    if read and session.get('primary_until', 0) < time.time() and not g.get('filling_cache'):
+        address = router.read_target(lambda a: probe_replica(a, user, password))
+
+    def connect():
+        if address is not None:
+            try:
+                return pool.acquire(address[0], user, password, database, port=address[1])
+            except mysql.connector.Error as e:
+                router.mark_down(address, e)
+        return pool.acquire(DB_HOST, user, password, database, port=DB_PORT)
+    return connect
+
+def probe_replica(address, user, password):
+    # REPLICA_MONITOR_USER (with REPLICATION CLIENT) measures lag when app users may not.
+    user = os.environ.get("REPLICA_MONITOR_USER", user)
+    password = os.environ.get("REPLICA_MONITOR_PASSWORD", password)
+    conn = pool.acquire(address[0], user, password, None, port=address[1])
+    try:
+        cursor = conn.cursor()
+        lag = replica_lag(cursor)
+        cursor.close()
+        return lag
+    finally:
+        conn.close()
+
+def get_connection(db=True, read=False):
     if 'user' not in session:
         return None
-    return mysql.connector.connect(
-        host="localhost",
-        user=session['user'],
-        password=session['password'],
-        database="cricket_league" if db else None
-    )
-
-def describe_table(cursor, table_name):
-    cursor.execute(f"DESCRIBE {table_name};")
-    return cursor.fetchall()  # list of tuples/dicts depending on cursor
-
-def get_primary_key(columns):
-    for col in columns:
-        if isinstance(col, dict):
-            if col.get('Key') == 'PRI':
-                return col['Field']
-        else:
-            if col[3] == 'PRI':
-                return col[0]
-    return None
+    conn = connector(read, db)()
+    g.setdefault('pooled_connections', []).append(conn)
+    return conn
 
-def is_auto_increment(col):
-    if isinstance(col, dict):
-        return 'auto_increment' in (col.get('Extra') or '')
-    else:
-        return 'auto_increment' in (col[5] or '')
+def discard_connection(conn):
+    # After a MySQL error mid-request the connection's state is unknown; don't pool it.
+    if conn is not None:
+        conn.discard()
+        conn.close()
+
+def note_write():
+    # Only the session that wrote reads from the primary; timer-driven ingest flushes have none.
+    if has_request_context():
+        session['primary_until'] = time.time() + STICKY_SECONDS
+
+@app.teardown_request
+def release_connections(exc=None):
+    # Hand back anything a route forgot to close (e.g. when a query raised).
+    for conn in g.pop('pooled_connections', []):
+        if exc is not None:
+            conn.discard()
+        conn.close()
+
+# ------------------- INSTRUMENTATION -------------------
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+    # One profiler at a time: on Python 3.12+ a second concurrent enable() raises ValueError.
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE and profile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # another tool (debugger, coverage) holds the profiling hook
+            profile_lock.release()
+            print("Profiler unavailable:", e)
+            return
+        g.profiler = profiler
+
+@app.after_request
+def remember_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request(exc=None):
+    # Runs after streamed bodies finish, so the timing covers the whole response.
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    status = 500 if exc is not None else g.pop('response_status', 200)
+    metrics.observe_request(route, status, time.perf_counter() - started)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        profile_lock.release()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+        logging.getLogger('cricket.profile').info("%s %s\n%s", request.method, request.path, out.getvalue())
+
+def invalidate_table(table_name):
+    note_write()
+    aggregate_cache.invalidate(table_name)
+    view_store.invalidate(table_name)
+    page_cache.invalidate(table_name)
+    search_index.invalidate(table_name)
+    analytics.invalidate(table_name)
+    if table_name.upper() == "MATCH_RESULTS":
+        aggregate_cache.invalidate("STANDINGS")
+        view_store.invalidate("STANDINGS")
+        page_cache.invalidate("STANDINGS")
+
+# Views, search, analytics and the schema registry live in each worker process. With
+# shared caches, other workers' writes reach them through the FileCache generation counters.
+LOCAL_TABLES = sorted({t for tables in VIEW_SOURCES.values() for t in tables} | set(SEARCH_FIELDS)
+                      | {t for tables in FRAME_SOURCES.values() for t in tables})
+SCHEMA_GENERATION = "__SCHEMA__"
+shared_seen = {}
+shared_seen_lock = threading.Lock()
+
+@app.before_request
+def sync_local_stores():
+    """Drop per-process data that another worker's write (or DDL) has made stale."""
+    if not isinstance(aggregate_cache, FileCache):
+        return
+    epoch = aggregate_cache.token()
+    with shared_seen_lock:
+        if shared_seen.get('__epoch__') == epoch:
+            return
+        current = aggregate_cache.generations(['__all__', SCHEMA_GENERATION] + LOCAL_TABLES)
+        changed = {name for name, gen in current.items() if shared_seen.get(name) != gen}
+        if '__all__' in changed:
+            view_store.clear()
+            search_index.clear()
+            analytics.clear()
+        if SCHEMA_GENERATION in changed:
+            schema_registry.invalidate()
+        for table_name in changed & set(LOCAL_TABLES):
+            view_store.invalidate(table_name)
+            search_index.invalidate(table_name)
+            analytics.invalidate(table_name)
+        shared_seen.update(current)
+        shared_seen['__epoch__'] = epoch
+
+def invalidate_schema():
+    # After DDL: this worker's table list, and (through the shared counter) every other worker's.
+    schema_registry.invalidate()
+    aggregate_cache.invalidate(SCHEMA_GENERATION)
+
+def list_tables(conn):
+    return schema_registry.tables(conn, session['user'])
+
+def get_table_schema(conn, table_name):
+    return schema_registry.table(conn, session['user'], table_name)
+
+def record_result_changes(conn, changes):
+    # Keep STANDINGS in step with MATCH_RESULTS writes, inside the caller's transaction.
+    results = get_table_schema(conn, "MATCH_RESULTS")
+    standings = get_table_schema(conn, "STANDINGS")
+    if results is None or standings is None:
+        return
+    apply_result_changes(conn, changes, nrr_enabled(results, standings))
+
+def cancel_query(conn):
+    """KILL QUERY whatever ``conn`` is running, from a second connection, and drop ``conn``."""
+    conn.discard()
+    try:
+        killer = pool.acquire(conn.host, session['user'], session.password, DB_NAME, port=conn.port)
+        cur = killer.cursor()
+        cur.execute(f"KILL QUERY {int(conn.connection_id)}")
+        cur.close()
+        killer.close()
+    except mysql.connector.Error as e:
+        print("KILL QUERY failed:", e)
+
+def run_queries(tasks):
+    # Worker threads have no session; connector() binds the credentials now. These
+    # results fill the aggregate cache and schema registry, so they come from the primary.
+    return run_parallel(connector(), tasks, FANOUT_DEADLINE)
 
-def parse_enum(type_str):
-    """Parse MySQL ENUM('A','B','C') into a Python list ['A','B','C']"""
-    if type_str and type_str.startswith("enum("):
-        return re.findall(r"'(.*?)'", type_str)
-    return None
+def load_leaderboard(extra_tasks=None):
+    """Cached Leaderboard (or None) plus the results of ``extra_tasks``, fetched in parallel."""
+    board = aggregate_cache.get('leaderboard')
+    token = aggregate_cache.token()
+    tasks = dict(extra_tasks or {})
+    if board is None:
+        tasks['players'] = with_cursor(Leaderboard.fetch_players)
+        tasks['teams'] = with_cursor(Leaderboard.fetch_team_names)
+    results, missing = run_queries(tasks) if tasks else ({}, {})
+    if board is None and 'players' in results:
+        board = Leaderboard(results['players'], results.get('teams', {}))
+        # A board without team names is only good for this one (partial) page.
+        if 'teams' in results:
+            aggregate_cache.set('leaderboard', board, Leaderboard.SOURCE_TABLES, token)
+    return board, results, missing
+
+def page_args():
+    size = min(max(request.args.get('size', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        after = decode_token(request.args.get('after'))
+        before = decode_token(request.args.get('before'))
+    except (ValueError, IndexError, TypeError):
+        after = before = None
+    return size, after, before
+
+def viewer_page(route, table_name, tables, render):
+    """Serve viewers from page_cache; ``render`` returns HTML, or a Response that must not be cached."""
+    if session.get('role') != "viewer":
+        return render()
+    key = (route, table_name, session['role'], request.query_string)
+    page = page_cache.get(key)
+    if page is None:
+        token = page_cache.token()
+        # Sync again after taking the token: a write since before_request either shows up
+        # here or makes the token stale, so a page built from stale local data isn't stored.
+        sync_local_stores()
+        g.filling_cache = True
+        html = render()
+        if not isinstance(html, str):
+            return html
+        page = page_cache.store(key, html, tables, token)
+    return cached_response(page, request)
+
+def stream_page(template_name, **context):
+    """Render a template chunk by chunk; ``rows`` may be a lazy cursor iterator."""
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER)
+    return Response(stream_with_context(stream), mimetype='text/html')
 
 # ------------------- LOGIN -------------------
 @app.route('/', methods=['GET', 'POST'])
@@ -50,23 +408,25 @@ def login():
         user = request.form['user']
         password = request.form['password']
         try:
-            conn = mysql.connector.connect(host="localhost", user=user, password=password)
-            cursor = conn.cursor()
-            cursor.execute("USE cricket_league;")
+            role = role_cache.get(user, password)
+            if role is None:
+                # Through the pool, so this connection serves the user's first page too.
+                conn = pool.acquire(DB_HOST, user, password, DB_NAME, port=DB_PORT)
+                cursor = conn.cursor()
 
 # Determine role based on MySQL user
-            cursor.execute("SELECT CURRENT_USER();")
-            current_user = cursor.fetchone()[0]
-            if current_user.startswith("viewer"):
-                session['role'] = "viewer"
-            else:
-                session['role'] = "manager"
+                cursor.execute("SELECT CURRENT_USER();")
+                current_user = cursor.fetchone()[0]
+                role = "viewer" if current_user.startswith("viewer") else "manager"
+                role_cache.set(user, password, role)
+                cursor.close()
+                conn.close()
 
+            session.clear()
+            session.rotate()
+            session['role'] = role
             session['user'] = user
-            session['password'] = password
-
-            cursor.close()
-            conn.close()
+            session.set_password(password)
             return redirect('/dashboard')
         except mysql.connector.Error as e:
             return render_template('login.html', message=f"❌ Login failed: {e}")
@@ -75,46 +435,29 @@ def login():
 # ------------------- DASHBOARD -------------------
 @app.route('/dashboard')
 def dashboard():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SHOW TABLES;")
-    tables = [t[0] for t in cursor.fetchall()]
+    if 'user' not in session:
+        return redirect('/')
+    return viewer_page('dashboard', None, Leaderboard.SOURCE_TABLES, render_dashboard)
 
-    stats = {}
-    try:
-        cursor.execute("""
-            SELECT P.player_name, SUM(PS.runs_scored) AS runs
-            FROM PLAYER_STATS PS
-            JOIN PLAYERS P ON PS.player_id = P.player_id
-            GROUP BY PS.player_id
-            ORDER BY runs DESC;
-        """)
-        stats['runs'] = cursor.fetchall()
-
-        cursor.execute("""
-            SELECT P.player_name, SUM(PS.wickets_taken) AS wickets
-            FROM PLAYER_STATS PS
-            JOIN PLAYERS P ON PS.player_id = P.player_id
-            GROUP BY PS.player_id
-            ORDER BY wickets DESC;
-        """)
-        stats['wickets'] = cursor.fetchall()
-
-        cursor.execute("""
-            SELECT P.player_name, SUM(PS.boundaries) AS boundaries
-            FROM PLAYER_STATS PS
-            JOIN PLAYERS P ON PS.player_id = P.player_id
-            GROUP BY PS.player_id
-            ORDER BY boundaries DESC;
-        """)
-        stats['boundaries'] = cursor.fetchall()
-    except Exception as e:
-        print("Stats error:", e)
-        stats = {'runs': [], 'wickets': [], 'boundaries': []}
+def render_dashboard():
+    user = session['user']
+    tables = schema_registry.peek_tables(user)
+    extra = {} if tables is not None else {'tables': lambda conn: schema_registry.tables(conn, user)}
+    board, results, missing = load_leaderboard(extra)
+    if tables is None:
+        tables = results.get('tables', [])
 
-    cursor.close()
-    conn.close()
-    return render_template('dashboard.html', tables=tables, stats=stats)
+    if board is not None:
+        stats = {
+            'runs': board.top('runs', LEADERBOARD_SIZE),
+            'wickets': board.top('wickets', LEADERBOARD_SIZE),
+            'boundaries': board.top('boundaries', LEADERBOARD_SIZE),
+        }
+    else:
+        stats = {'runs': [], 'wickets': [], 'boundaries': []}
+    html = render_template('dashboard.html', tables=tables, stats=stats, partial=bool(missing))
+    # Don't keep serving a page that is missing some of its data.
+    return Response(html, mimetype='text/html') if missing else html
 
 # ------------------- TABLE ACTIONS -------------------
 @app.route('/table/<table_name>')
@@ -128,12 +471,20 @@ def table_actions(table_name):
 def table_read(table_name):
     if session.get('role') == "viewer":
         return render_template("error.html", message="❌ Access Denied (Read-Only User)")
-    conn = get_connection()
+    conn = get_connection(read=True)
+    table = get_table_schema(conn, table_name)
+    if table is None:
+        conn.close()
+        return render_template('error.html', message=f"❌ Unknown table: {table_name}")
     cursor = conn.cursor()
     try:
-        cursor.execute(f"SELECT * FROM {table_name};")
-        rows = cursor.fetchall()
-        columns = [d[0] for d in cursor.description] if cursor.description else []
+        pk = table.single_pk
+        if pk is None or request.args.get('stream'):
+            cursor.execute(f"SELECT * FROM {table_name};")
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            return stream_page('table_read.html', table_name=table_name, columns=columns, rows=iter_rows(cursor), page=None)
+        size, after, before = page_args()
+        page = fetch_page(cursor, table_name, pk, size, after, before)
     except mysql.connector.Error as e:
         rows, columns = [], []
         message = f"❌ MySQL Error: {e}"
@@ -142,7 +493,7 @@ def table_read(table_name):
         return render_template('view_table.html', tables=None, selected_table=table_name, columns=columns, rows=rows, message=message)
     cursor.close()
     conn.close()
-    return render_template('table_read.html', table_name=table_name, columns=columns, rows=rows)
+    return render_template('table_read.html', table_name=table_name, columns=page.columns, rows=page.rows, page=page)
 
 # ------------------- INSERT -------------------
 @app.route('/table/<table_name>/insert', methods=['GET', 'POST'])
@@ -151,34 +502,14 @@ def table_insert(table_name):
         return render_template("error.html", message="❌ Access Denied (Read-Only User)")
     
     conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(f"DESCRIBE {table_name};")
-    columns = cursor.fetchall()
+    table = get_table_schema(conn, table_name)
+    if table is None:
+        conn.close()
+        return render_template('error.html', message=f"❌ Unknown table: {table_name}")
+    cursor = conn.cursor()
+    insert_columns = table.insert_columns
     message = None
 
-    insert_columns = []
-    for col in columns:
-        if is_auto_increment(col):
-            continue
-        col_name = col['Field']
-        col_type = col['Type']
-        enum_values = parse_enum(col_type)
-        field_info = {
-            'Field': col_name,
-            'Type': col_type,
-            'Key': col['Key'],
-            'Extra': col['Extra'],
-            'EnumValues': enum_values
-        }
-
-        if table_name.upper() == "PLAYERS" and col_name.lower() == "player_id":
-            insert_columns.append(field_info)
-        elif col_name.lower().endswith("_id") and col['Key'] == 'PRI' and table_name.upper() != "PLAYERS":
-            if not is_auto_increment(col):
-                insert_columns.append(field_info)
-        else:
-            insert_columns.append(field_info)
-
     if request.method == 'POST':
         try:
             values = []
@@ -199,9 +530,13 @@ def table_insert(table_name):
             else:
                 insert_query = f"INSERT INTO {table_name} ({', '.join(fields_to_insert)}) VALUES ({', '.join(placeholders)})"
                 cursor.execute(insert_query, values)
+                if table_name.upper() == "MATCH_RESULTS":
+                    record_result_changes(conn, [(None, from_dict(table_name, dict(zip(fields_to_insert, values))))])
             conn.commit()
+            invalidate_table(table_name)
             message = "✅ Record inserted successfully!"
         except mysql.connector.Error as e:
+            conn.rollback()
             message = f"❌ MySQL Error: {e}"
             print(traceback.format_exc())
 
@@ -209,65 +544,178 @@ def table_insert(table_name):
     conn.close()
     return render_template('insert_form.html', table_name=table_name, columns=insert_columns, message=message)
 
+# ------------------- BULK IMPORT -------------------
+@app.route('/table/<table_name>/import', methods=['GET', 'POST'])
+def table_import(table_name):
+    if session.get('role') == "viewer":
+        return render_template("error.html", message="❌ Access Denied (Read-Only User)")
+    conn = get_connection()
+    table = get_table_schema(conn, table_name)
+    if table is None:
+        conn.close()
+        return render_template('error.html', message=f"❌ Unknown table: {table_name}")
+    columns = [c['Field'] for c in table.insert_columns]
+    chunk_size = request.form.get('chunk_size', IMPORT_CHUNK_SIZE, type=int) or IMPORT_CHUNK_SIZE
+    report = None
+    message = None
+
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            message = "❌ Choose a file to import."
+        else:
+            fmt = 'csv' if request.form.get('format', 'csv') == 'csv' else 'jsonl'
+            report = ImportReport()
+            try:
+                on_insert = None
+                if table.name.upper() == "MATCH_RESULTS":
+                    on_insert = lambda rows: record_result_changes(conn, [(None, row) for row in rows])
+                import_records(conn, table, read_records(upload, fmt), max(chunk_size, 1), on_insert, report)
+            except (UnicodeDecodeError, ValueError, csv.Error) as e:
+                message = f"❌ Could not read file: {e}"
+            except mysql.connector.Error as e:
+                # Earlier chunks are committed; the failing one was rolled back with the connection.
+                conn.discard()
+                message = f"❌ MySQL Error after {report.inserted} row(s) were committed: {e}"
+            invalidate_table(table_name)
+
+    conn.close()
+    return render_template('import.html', table_name=table_name, columns=columns,
+                           chunk_size=chunk_size, report=report, message=message)
+
+# ------------------- BALL-BY-BALL INGEST -------------------
+def ingest_connect():
+    # Bound to this user's credentials now; used only for flushes this request triggers.
+    return connector()
+
+@app.route('/ingest', methods=['GET', 'POST'])
+def ingest():
+    if 'user' not in session:
+        return redirect('/')
+    if session.get('role') == "viewer":
+        return render_template("error.html", message="❌ Access Denied (Read-Only User)")
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        events = payload.get('events') if isinstance(payload, dict) else payload
+        if not isinstance(events, list):
+            return jsonify({'error': "Expected a JSON list of events or {\"events\": [...]}"}), 400
+        pairs = [(i, e if isinstance(e, dict) else {}) for i, e in enumerate(events, start=1)]
+        try:
+            accepted, duplicates, errors, report = ingestor.add(pairs, ingest_connect())
+        except mysql.connector.Error as e:
+            return jsonify({'error': f"Flush failed, events kept buffered: {e}", 'buffered': ingestor.buffered()}), 503
+        return jsonify({'accepted': accepted, 'duplicates': duplicates, 'errors': errors,
+                        'buffered': ingestor.buffered(), 'flushed': report.as_dict() if report else None})
+
+    result = None
+    message = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            message = "❌ Choose a JSON-lines file of deliveries."
+        else:
+            pairs, errors = [], []
+            try:
+                for line_no, record, error in read_records(upload, 'jsonl'):
+                    if error:
+                        errors.append((line_no, error))
+                    else:
+                        pairs.append((line_no, record))
+                accepted, duplicates, add_errors, report = ingestor.add(pairs, ingest_connect())
+                result = {'accepted': accepted, 'duplicates': duplicates, 'errors': errors + add_errors, 'flushed': report}
+            except UnicodeDecodeError as e:
+                message = f"❌ Could not read file: {e}"
+            except mysql.connector.Error as e:
+                message = f"❌ Flush failed, events kept buffered: {e}"
+    return render_template('ingest.html', result=result, message=message,
+                           buffered=ingestor.buffered(), totals=ingestor.totals)
+
+@app.route('/ingest/flush', methods=['POST'])
+def ingest_flush():
+    if 'user' not in session:
+        return redirect('/')
+    if session.get('role') == "viewer":
+        return render_template("error.html", message="❌ Access Denied (Read-Only User)")
+    message = None
+    result = None
+    try:
+        result = {'accepted': 0, 'duplicates': 0, 'errors': [], 'flushed': ingestor.flush(ingest_connect())}
+    except mysql.connector.Error as e:
+        message = f"❌ Flush failed, events kept buffered: {e}"
+    return render_template('ingest.html', result=result, message=message,
+                           buffered=ingestor.buffered(), totals=ingestor.totals)
+
 # ------------------- UPDATE -------------------
+def selected_ids():
+    """Primary keys picked on a select page: the batch checkboxes, or the single selected_id."""
+    ids = [v for v in request.form.getlist('selected_ids') if v != ""]
+    if not ids and request.form.get('selected_id') not in (None, ""):
+        ids = [request.form.get('selected_id')]
+    return list(dict.fromkeys(ids))[:MAX_BATCH]
+
+def fetch_rows_by_pk(cursor, table_name, pk, ids, for_update=False):
+    cursor.execute(f"SELECT * FROM {table_name} WHERE {pk} IN ({', '.join(['%s'] * len(ids))})"
+                   + (" FOR UPDATE;" if for_update else ";"), ids)
+    return fetch_records(cursor, table_name)
+
+def select_page(conn, template_name, table_name, pk):
+    # One preview query; the dropdown is built from the same rows.
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table_name} ORDER BY {pk} LIMIT {MAX_BATCH};")
+    rows = fetch_records(cursor, table_name)
+    columns = [d[0] for d in cursor.description] if cursor.description else []
+    cursor.close()
+    conn.close()
+    return render_template(template_name, table_name=table_name, pk=pk, pk_rows=[r[pk] for r in rows],
+                           rows=rows, columns=columns)
+
 @app.route('/table/<table_name>/update', methods=['GET', 'POST'])
 def table_update(table_name):
     if session.get('role') == "viewer":
         return render_template("error.html", message="❌ Access Denied (Read-Only User)")
     conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(f"DESCRIBE {table_name};")
-    columns = cursor.fetchall()
-    pk = get_primary_key(columns)
+    table = get_table_schema(conn, table_name)
+    if table is None:
+        conn.close()
+        return render_template('error.html', message=f"❌ Unknown table: {table_name}")
+    pk = table.pk
     message = None
 
     if not pk:
-        cursor.close()
         conn.close()
         return render_template('error.html', message=f"No primary key found for {table_name}; update not supported.")
 
     if request.method == 'GET':
-        cursor2 = conn.cursor()
-        cursor2.execute(f"SELECT {pk} FROM {table_name} LIMIT 500;")
-        pk_rows = [r[0] for r in cursor2.fetchall()]
-        cursor3 = conn.cursor()
-        cursor3.execute(f"SELECT * FROM {table_name} LIMIT 200;")
-        rows = cursor3.fetchall()
-        columns_display = [desc[0] for desc in cursor3.description] if cursor3.description else []
-        cursor2.close()
-        cursor3.close()
-        cursor.close()
-        conn.close()
-        return render_template('update_select.html', table_name=table_name, pk=pk, pk_rows=pk_rows, rows=rows, columns=columns_display)
+        return select_page(conn, 'update_select.html', table_name, pk)
 
     action = request.form.get('action')
+    ids = selected_ids()
+    if not ids:
+        conn.close()
+        return render_template('update_result.html', table_name=table_name, message="❌ Select at least one record.")
+    cursor = conn.cursor()
+
     if action == 'select_row':
-        selected_id = request.form.get('selected_id')
-        cursor.execute(f"SELECT * FROM {table_name} WHERE {pk} = %s LIMIT 1;", (selected_id,))
-        row = cursor.fetchone()
-        editable_cols = []
-        for col in columns:
-            field_name = col['Field']
-            enum_values = parse_enum(col['Type'])
-            col['EnumValues'] = enum_values
-            if field_name == pk:
-                if table_name.upper() == "PLAYERS" and pk.lower() == "player_id":
-                    editable_cols.append(col)
-            elif not is_auto_increment(col):
-                editable_cols.append(col)
+        rows = fetch_rows_by_pk(cursor, table_name, pk, ids)
         cursor.close()
         conn.close()
-        return render_template('update_form.html', table_name=table_name, pk=pk, row=row, columns=editable_cols)
+        if len(ids) == 1:
+            return render_template('update_form.html', table_name=table_name, pk=pk,
+                                   row=rows[0] if rows else None, columns=table.editable_columns)
+        # Setting a key to one value across many rows never makes sense.
+        columns = [c for c in table.editable_columns if c['Field'] not in table.primary_keys]
+        return render_template('update_form.html', table_name=table_name, pk=pk, row=None, rows=rows,
+                               batch_ids=ids, columns=columns)
 
     elif action == 'do_update':
-        selected_id = request.form.get('selected_id')
+        batch = bool(request.form.getlist('selected_ids'))
+        applied = set(request.form.getlist('apply')) if batch else None
         set_clauses = []
         values = []
-        for col in columns:
+        changed = {}
+        for col in table.editable_columns:
             fname = col['Field']
-            if fname == pk and not (table_name.upper() == "PLAYERS" and pk.lower() == "player_id"):
-                continue
-            if is_auto_increment(col) and not (table_name.upper() == "PLAYERS" and fname.lower() == "player_id"):
+            if batch and (fname not in applied or fname in table.primary_keys):
                 continue
             if fname in request.form:
                 val = request.form.get(fname)
@@ -275,18 +723,28 @@ def table_update(table_name):
                     val = None
                 set_clauses.append(f"{fname} = %s")
                 values.append(val)
+                changed[fname] = val
         if not set_clauses:
             message = "❌ No updatable fields were provided."
         else:
-            values.append(selected_id)
-            update_query = f"UPDATE {table_name} SET {', '.join(set_clauses)} WHERE {pk} = %s;"
+            update_query = (f"UPDATE {table_name} SET {', '.join(set_clauses)} "
+                            f"WHERE {pk} IN ({', '.join(['%s'] * len(ids))});")
             try:
-                cur = conn.cursor()
-                cur.execute(update_query, values)
+                old_rows = []
+                if table_name.upper() == "MATCH_RESULTS":
+                    old_rows = fetch_rows_by_pk(cursor, table_name, pk, ids, for_update=True)
+                cursor.execute(update_query, values + ids)
+                updated = cursor.rowcount
+                if old_rows:
+                    record_result_changes(conn, [(old, old.replace(changed)) for old in old_rows])
                 conn.commit()
-                cur.close()
-                message = "✅ Record updated successfully!"
+                invalidate_table(table_name)
+                if len(ids) == 1:
+                    message = "✅ Record updated successfully!"
+                else:
+                    message = f"✅ {updated} of {len(ids)} records updated in one statement."
             except mysql.connector.Error as e:
+                conn.rollback()
                 message = f"❌ MySQL Error: {e}"
                 print(traceback.format_exc())
         cursor.close()
@@ -303,47 +761,48 @@ def table_delete(table_name):
     if session.get('role') == "viewer":
         return render_template("error.html", message="❌ Access Denied (Read-Only User)")
     conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(f"DESCRIBE {table_name};")
-    columns = cursor.fetchall()
-    pk = get_primary_key(columns)
+    table = get_table_schema(conn, table_name)
+    if table is None:
+        conn.close()
+        return render_template('error.html', message=f"❌ Unknown table: {table_name}")
+    pk = table.pk
     message = None
 
     if not pk:
-        cursor.close()
         conn.close()
         return render_template('error.html', message=f"No primary key found for {table_name}; delete not supported.")
 
     if request.method == 'GET':
-        cursor2 = conn.cursor()
-        cursor2.execute(f"SELECT {pk} FROM {table_name} LIMIT 500;")
-        pk_rows = [r[0] for r in cursor2.fetchall()]
-        cursor3 = conn.cursor()
-        cursor3.execute(f"SELECT * FROM {table_name} LIMIT 200;")
-        rows = cursor3.fetchall()
-        columns_display = [desc[0] for desc in cursor3.description] if cursor3.description else []
-        cursor2.close()
-        cursor3.close()
-        cursor.close()
-        conn.close()
-        return render_template('delete_select.html', table_name=table_name, pk=pk, pk_rows=pk_rows, rows=rows, columns=columns_display)
+        return select_page(conn, 'delete_select.html', table_name, pk)
 
-    selected_id = request.form.get('selected_id')
+    ids = selected_ids()
+    if not ids:
+        conn.close()
+        return render_template('delete_result.html', table_name=table_name, message="❌ Select at least one record.")
+    cursor = conn.cursor()
     confirm = request.form.get('confirm')
     if not confirm:
-        cursor.execute(f"SELECT * FROM {table_name} WHERE {pk} = %s LIMIT 1;", (selected_id,))
-        row = cursor.fetchone()
+        rows = fetch_rows_by_pk(cursor, table_name, pk, ids)
         cursor.close()
         conn.close()
-        return render_template('delete_confirm.html', table_name=table_name, pk=pk, row=row, selected_id=selected_id)
+        return render_template('delete_confirm.html', table_name=table_name, pk=pk, rows=rows, selected_ids=ids)
     else:
         try:
-            cur = conn.cursor()
-            cur.execute(f"DELETE FROM {table_name} WHERE {pk} = %s;", (selected_id,))
+            old_rows = []
+            if table_name.upper() == "MATCH_RESULTS":
+                old_rows = fetch_rows_by_pk(cursor, table_name, pk, ids, for_update=True)
+            cursor.execute(f"DELETE FROM {table_name} WHERE {pk} IN ({', '.join(['%s'] * len(ids))});", ids)
+            deleted = cursor.rowcount
+            if old_rows:
+                record_result_changes(conn, [(old, None) for old in old_rows])
             conn.commit()
-            cur.close()
-            message = "✅ Record deleted successfully!"
+            invalidate_table(table_name)
+            if len(ids) == 1:
+                message = "✅ Record deleted successfully!"
+            else:
+                message = f"✅ {deleted} of {len(ids)} records deleted in one statement."
         except mysql.connector.Error as e:
+            conn.rollback()
             message = f"❌ MySQL Error: {e}"
             print(traceback.format_exc())
         cursor.close()
@@ -353,119 +812,66 @@ def table_delete(table_name):
 # ------------------- VIEW DATABASE -------------------
 @app.route('/viewdb')
 def view_database():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SHOW TABLES;")
-    tables = [t[0] for t in cursor.fetchall()]
-    cursor.close()
+    # Only DDL changes the table list, and /query clears the whole cache for that.
+    return viewer_page('viewdb', None, (), render_view_database)
+
+def render_view_database():
+    conn = get_connection(read=True)
+    tables = list_tables(conn)
     conn.close()
     return render_template('view_table.html', tables=tables, selected_table=None)
 
 # ------------------- VIEW TABLE -------------------
 @app.route('/viewdb/<table_name>')
 def view_table(table_name):
-    conn = get_connection()
+    tables = VIEW_SOURCES.get(table_name.upper(), (table_name,))
+    return viewer_page('viewdb_table', table_name.upper(), tables, lambda: render_view_table(table_name))
+
+def render_view_table(table_name):
+    query = VIEW_QUERIES.get(table_name.upper())
+    # Joined views are materialized into view_store, which every user then reads.
+    conn = get_connection(read=not query)
     cursor = conn.cursor()
 
-    # Joined / formatted queries (restoring the original behavior)
-    queries = {
-        "STANDINGS": """
-            SELECT 
-                ROW_NUMBER() OVER (ORDER BY S.points DESC, S.net_run_rate DESC) AS 'Rank',
-                T.team_name AS 'Team',
-                S.matches_played AS 'Matches Played',
-                S.wins AS 'Wins',
-                S.losses AS 'Losses',
-                S.ties AS 'Ties',
-                S.points AS 'Points',
-                S.net_run_rate AS 'Net Run Rate'
-            FROM STANDINGS S
-            JOIN TEAMS T ON S.team_id = T.team_id
-            ORDER BY S.points DESC, S.net_run_rate DESC;
-        """,
-
-        "PLAYER_STATS": """
-            SELECT 
-                P.player_name AS 'Player',
-                P.role AS 'Role',
-                PS.runs_scored AS 'Runs',
-                PS.wickets_taken AS 'Wickets',
-                PS.boundaries AS 'Boundaries',
-                T.team_name AS 'Team'
-            FROM PLAYER_STATS PS
-            JOIN PLAYERS P ON PS.player_id = P.player_id
-            JOIN TEAMS T ON P.team_id = T.team_id
-            ORDER BY Runs DESC;
-        """,
-
-        "MATCH_RESULTS": """
-            SELECT 
-                MR.result_id AS 'Result ID',
-                M.match_id AS 'Match ID',
-                H.team_name AS 'Home Team',
-                A.team_name AS 'Away Team',
-                W.team_name AS 'Winner',
-                P.player_name AS 'Man of the Match'
-            FROM MATCH_RESULTS MR
-            JOIN MATCHES M ON MR.match_id = M.match_id
-            JOIN TEAMS H ON M.home_team_id = H.team_id
-            JOIN TEAMS A ON M.away_team_id = A.team_id
-            LEFT JOIN TEAMS W ON MR.winner_team_id = W.team_id
-            JOIN PLAYERS P ON MR.man_of_the_match = P.player_id;
-        """,
-
-        "MATCHES": """
-            SELECT 
-                M.match_id AS 'Match ID',
-                H.team_name AS 'Home Team',
-                A.team_name AS 'Away Team',
-                M.status AS 'Status',
-                M.match_type AS 'Type',
-                M.match_date AS 'Date',
-                V.venue_name AS 'Venue'
-            FROM MATCHES M
-            JOIN TEAMS H ON M.home_team_id = H.team_id
-            JOIN TEAMS A ON M.away_team_id = A.team_id
-            JOIN VENUES V ON M.venue_id = V.venue_id
-            ORDER BY M.match_date;
-        """,
-
-        "PLAYERS_CONTACTS": """
-            SELECT 
-                P.player_name AS 'Player',
-                PC.contact_no AS 'Contact',
-                T.team_name AS 'Team'
-            FROM PLAYERS_CONTACTS PC
-            JOIN PLAYERS P ON PC.player_id = P.player_id
-            JOIN TEAMS T ON P.team_id = T.team_id;
-        """,
-
-        "PLAYERS": """
-            SELECT player_name AS 'Player', DOB, role AS 'Role', batting_style AS 'Batting', bowling_style AS 'Bowling', T.team_name AS 'Team'
-            FROM PLAYERS P
-            JOIN TEAMS T ON P.team_id = T.team_id;
-        """,
-
-        "TEAMS": """
-            SELECT team_name AS 'Team', coach_name AS 'Coach', home_city AS 'City'
-            FROM TEAMS;
-        """,
-
-        "VENUES": """
-            SELECT venue_name AS 'Venue', city AS 'City', capacity AS 'Capacity'
-            FROM VENUES;
-        """
-    }
+    table = get_table_schema(conn, table_name)
+    if table is None:
+        cursor.close()
+        conn.close()
+        # A Response, so viewer_page doesn't cache a page per made-up table name.
+        return Response(render_template('error.html', message=f"❌ Unknown table: {table_name}"), mimetype='text/html')
+    size, after, before = page_args()
+    if query and not request.args.get('stream'):
+        snapshot = view_store.get(conn, session['user'], table_name)
+        if snapshot is not None:
+            cursor.close()
+            conn.close()
+            page = slice_page(snapshot[0], snapshot[1], size, after, before)
+            return render_template('view_table.html', tables=None, selected_table=table_name, columns=page.columns, rows=page.rows, page=page, joined_view=True)
+
+    pk = None if query else table.single_pk
+    keyed = pk is not None or (query and table_name.upper() in VIEW_KEYS)
+    if not keyed or request.args.get('stream'):
+        # Keyless tables and views, and "Show All", are streamed in full.
+        cursor.execute(query or f"SELECT * FROM {table_name};")
+        columns = [desc[0] for desc in cursor.description]
+        return stream_page('view_table.html', tables=None, selected_table=table_name, columns=columns, rows=iter_rows(cursor), page=None, joined_view=bool(query))
 
-    query = queries.get(table_name.upper(), f"SELECT * FROM {table_name};")
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
+    try:
+        if query:
+            # Too large to materialize: keyset pages over the join.
+            page = fetch_view_page(cursor, table_name, size, after, before)
+        else:
+            page = fetch_page(cursor, table_name, pk, size, after, before)
+    except mysql.connector.Error as e:
+        cursor.close()
+        conn.close()
+        message = f"❌ MySQL Error: {e}"
+        return Response(render_template('view_table.html', tables=None, selected_table=table_name, columns=[], rows=[], message=message), mimetype='text/html')
 
     cursor.close()
     conn.close()
 
-    return render_template('view_table.html', tables=None, selected_table=table_name, columns=columns, rows=rows)
+    return render_template('view_table.html', tables=None, selected_table=table_name, columns=page.columns, rows=page.rows, page=page, joined_view=bool(query))
 
 
 # ------------------- SQL QUERY EXECUTION -------------------
@@ -476,84 +882,209 @@ def query():
     result = None
     columns = None
     message = None
+    row_stream = None
     query_text = ""
     if request.method == 'POST':
         query_text = request.form['sql']
+        # One classifier decides both where the statement runs and whether its rows are shown.
+        reading = is_read_only(query_text)
         try:
-            conn = get_connection()
+            conn = get_connection(read=reading)
+            # Ad-hoc SQL may USE, SET, LOCK TABLES or GET_LOCK; don't hand that state to later requests.
+            conn.reset_on_release()
             cursor = conn.cursor()
-            cursor.execute(query_text)
-            if query_text.strip().lower().startswith(("select", "show", "desc", "describe")):
-                result = cursor.fetchall()
+            cursor.label_as = ADHOC_SQL_LABEL
+            sql = query_text
+            if reading and is_select(query_text):
+                estimate = estimate_rows(cursor, query_text)
+                if estimate > QUERY_REFUSE_ROWS:
+                    cursor.close()
+                    conn.close()
+                    message = f"❌ Refused: MySQL estimates about {estimate:,} rows examined (limit {QUERY_REFUSE_ROWS:,})."
+                    return render_template('query.html', result=None, columns=None, message=message, query_text=query_text)
+                if estimate > QUERY_WARN_ROWS:
+                    message = f"⚠ Expensive query: MySQL estimates about {estimate:,} rows examined."
+                sql = with_time_limit(query_text, QUERY_MAX_EXECUTION_MS)
+            cursor.execute(sql)
+            if reading:
                 columns = [desc[0] for desc in cursor.description]
+                row_stream = RowStream(cursor, QUERY_ROW_CAP, lambda: cancel_query(conn))
+                if request.form.get('stream'):
+                    return stream_page('query.html', result=row_stream, columns=columns, message=message,
+                                       query_text=query_text, row_stream=row_stream)
+                # RowStream closes the cursor itself, or kills the statement if it stopped early.
+                result = list(row_stream)
             else:
                 conn.commit()
+                note_write()
+                # Arbitrary SQL can touch any table (or the schema): drop everything.
+                aggregate_cache.clear()
+                view_store.clear()
+                page_cache.clear()
+                search_index.clear()
+                analytics.clear()
+                if is_ddl(query_text):
+                    invalidate_schema()
                 message = "✅ Query executed successfully!"
-            cursor.close()
+                cursor.close()
             conn.close()
         except mysql.connector.Error as e:
             message = f"❌ MySQL Error: {e}"
         except Exception as e:
             message = f"❌ Error: {e}"
-    return render_template('query.html', result=result, columns=columns, message=message, query_text=query_text)
+    return render_template('query.html', result=result, columns=columns, message=message, query_text=query_text, row_stream=row_stream)
+
+# ------------------- SEARCH -------------------
+def run_search():
+    query_text = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', SEARCH_LIMIT, type=int), 1), 100)
+    tables = {t.upper() for t in request.args.getlist('table')} & set(SEARCH_FIELDS) or None
+    if not query_text:
+        return query_text, [], 0.0
+    search_index.ensure(get_connection)
+    started = time.perf_counter()
+    results = search_index.search(query_text, limit, tables)
+    return query_text, results, (time.perf_counter() - started) * 1000
+
+@app.route('/search')
+def search():
+    if 'user' not in session:
+        return redirect('/')
+    try:
+        query_text, results, elapsed_ms = run_search()
+    except mysql.connector.Error as e:
+        return render_template('search.html', query_text=request.args.get('q', ''), results=[], message=f"❌ MySQL Error: {e}")
+    return render_template('search.html', query_text=query_text, results=results, elapsed_ms=elapsed_ms)
+
+@app.route('/api/search')
+def search_api():
+    if 'user' not in session:
+        return jsonify({'error': "Not logged in"}), 401
+    try:
+        query_text, results, elapsed_ms = run_search()
+    except mysql.connector.Error as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({'query': query_text, 'results': results, 'elapsed_ms': round(elapsed_ms, 3)})
+
+# ------------------- EXPORT -------------------
+def export_args():
+    fmt = 'ndjson' if request.values.get('format') == 'ndjson' else 'csv'
+    return fmt, bool(request.values.get('gzip'))
+
+@app.route('/export/table/<table_name>')
+def export_table(table_name):
+    if 'user' not in session:
+        return redirect('/')
+    if session.get('role') == "viewer":
+        return render_template("error.html", message="❌ Access Denied (Read-Only User)")
+    conn = None
+    try:
+        conn = get_connection(read=True)
+        table = get_table_schema(conn, table_name)
+        if table is None:
+            conn.close()
+            return render_template('error.html', message=f"❌ Unknown table: {table_name}")
+        fmt, gzip = export_args()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM {table.name};")
+    except mysql.connector.Error as e:
+        discard_connection(conn)
+        return render_template('error.html', message=f"❌ MySQL Error: {e}")
+    return export_response(cursor, fmt, table.name, gzip)
+
+@app.route('/export/view/<table_name>')
+def export_view(table_name):
+    if 'user' not in session:
+        return redirect('/')
+    query = VIEW_QUERIES.get(table_name.upper())
+    if query is None:
+        return render_template('error.html', message=f"❌ No joined view for {table_name}")
+    fmt, gzip = export_args()
+    conn = None
+    try:
+        conn = get_connection(read=True)
+        cursor = conn.cursor()
+        cursor.execute(query)
+    except mysql.connector.Error as e:
+        discard_connection(conn)
+        return render_template('error.html', message=f"❌ MySQL Error: {e}")
+    return export_response(cursor, fmt, table_name.lower(), gzip)
+
+@app.route('/query/export', methods=['POST'])
+def export_query():
+    if 'user' not in session:
+        return redirect('/')
+    query_text = request.form.get('sql', '')
+    if not is_read_only(query_text):
+        return render_template('query.html', result=None, columns=None, query_text=query_text,
+                               message="❌ Only a single read-only statement can be exported.")
+    fmt, gzip = export_args()
+    conn = None
+    try:
+        conn = get_connection(read=True)
+        conn.reset_on_release()
+        cursor = conn.cursor()
+        cursor.label_as = ADHOC_SQL_LABEL
+        sql = query_text
+        # Same guard as /query: no careless full scans through the export URL either.
+        if is_select(query_text):
+            estimate = estimate_rows(cursor, query_text)
+            if estimate > QUERY_REFUSE_ROWS:
+                cursor.close()
+                conn.close()
+                message = f"❌ Refused: MySQL estimates about {estimate:,} rows examined (limit {QUERY_REFUSE_ROWS:,})."
+                return render_template('query.html', result=None, columns=None, query_text=query_text, message=message)
+            sql = with_time_limit(query_text, QUERY_MAX_EXECUTION_MS)
+        cursor.execute(sql)
+    except mysql.connector.Error as e:
+        discard_connection(conn)
+        return render_template('query.html', result=None, columns=None, query_text=query_text,
+                               message=f"❌ MySQL Error: {e}")
+    return export_response(cursor, fmt, 'query', gzip)
 
 # ------------------- STATS -------------------
 @app.route('/stats')
 def stats():
-    conn = get_connection()
-    cursor = conn.cursor()
-    stats = {}
-    try:
-        cursor.execute("""
-            SELECT P.player_name, SUM(PS.runs_scored) AS total_runs
-            FROM PLAYER_STATS PS
-            JOIN PLAYERS P ON PS.player_id = P.player_id
-            GROUP BY PS.player_id
-            ORDER BY total_runs DESC
-            LIMIT 1;
-        """)
-        r = cursor.fetchone()
-        stats['top_scorer'] = {'player': r[0], 'runs': int(r[1])} if r else None
-
-        cursor.execute("""
-            SELECT P.player_name, SUM(PS.wickets_taken) AS total_wkts
-            FROM PLAYER_STATS PS
-            JOIN PLAYERS P ON PS.player_id = P.player_id
-            GROUP BY PS.player_id
-            ORDER BY total_wkts DESC
-            LIMIT 1;
-        """)
-        r = cursor.fetchone()
-        stats['top_bowler'] = {'player': r[0], 'wickets': int(r[1])} if r else None
-
-        cursor.execute("""
-            SELECT P.player_name, SUM(PS.boundaries) AS total_boundaries
-            FROM PLAYER_STATS PS
-            JOIN PLAYERS P ON PS.player_id = P.player_id
-            GROUP BY PS.player_id
-            ORDER BY total_boundaries DESC
-            LIMIT 1;
-        """)
-        r = cursor.fetchone()
-        stats['top_boundaries'] = {'player': r[0], 'boundaries': int(r[1])} if r else None
-
-        cursor.execute("""
-            SELECT T.team_name, COALESCE(SUM(PS.runs_scored),0) AS team_runs
-            FROM TEAMS T
-            LEFT JOIN PLAYERS P ON P.team_id = T.team_id
-            LEFT JOIN PLAYER_STATS PS ON PS.player_id = P.player_id
-            GROUP BY T.team_id
-            ORDER BY team_runs DESC
-            LIMIT 3;
-        """)
-        rows = cursor.fetchall()
-        stats['top_teams_by_runs'] = [{'team': r[0], 'runs': int(r[1])} for r in rows]
+    if 'user' not in session:
+        return redirect('/')
+    board, results, missing = load_leaderboard()
+    if board is None:
+        return render_template('stats.html', stats={'error': missing.get('players', 'no data')})
+    stats = {'top_teams_by_runs': board.top_teams_by_runs(3), 'partial': bool(missing)}
+    for key, field in (('top_scorer', 'runs'), ('top_bowler', 'wickets'), ('top_boundaries', 'boundaries')):
+        top = board.top(field, 1)
+        stats[key] = {'player': top[0][0], field: top[0][1]} if top else None
+    panels = None
+    if analytics_available():
+        try:
+            panels = analytics.panels(get_connection)
+        except mysql.connector.Error as e:
+            print("Analytics load failed:", e)
+    return render_template('stats.html', stats=stats, panels=panels)
 
-    except mysql.connector.Error as e:
-        stats['error'] = str(e)
-    cursor.close()
-    conn.close()
-    return render_template('stats.html', stats=stats)
+# ------------------- METRICS -------------------
+@app.route('/metrics')
+def metrics_endpoint():
+    # Scrapers send METRICS_TOKEN as a bearer token; otherwise a manager must be logged in.
+    token = os.environ.get("METRICS_TOKEN")
+    scraper = token and request.headers.get('Authorization') == f"Bearer {token}"
+    if not scraper and session.get('role') != "manager":
+        return Response("unauthorized\n", status=401, mimetype='text/plain')
+    extra = {f"db_pool_{k}": v for k, v in pool.stats().items()}
+    extra['aggregate_cache_hits_total'] = aggregate_cache.hits
+    extra['aggregate_cache_misses_total'] = aggregate_cache.misses
+    extra['page_cache_hits_total'] = page_cache.hits
+    extra['page_cache_misses_total'] = page_cache.misses
+    extra['role_cache_hits_total'] = role_cache.hits
+    extra['role_cache_misses_total'] = role_cache.misses
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+# ------------------- POOL METRICS -------------------
+@app.route('/pool/stats')
+def pool_stats():
+    if session.get('role') != "manager":
+        return render_template("error.html", message="❌ Access Denied")
+    return jsonify({**pool.stats(), 'routing': router.status()})
 
 # ------------------- LOGOUT -------------------
 @app.route('/logout')
@@ -561,5 +1092,140 @@ def logout():
     session.clear()
     return redirect('/')
 
+# ------------------- CLI -------------------
+@app.cli.command('standings')
+@click.option('--fix', is_flag=True, help="Overwrite STANDINGS with the rebuilt values.")
+def standings_command(fix):
+    """Rebuild STANDINGS from MATCH_RESULTS and report teams that drifted.
+
+    Uses the DB_USER / DB_PASSWORD environment variables.
+    """
+    user = os.environ.get("DB_USER", "root")
+    conn = pool.acquire(DB_HOST, user, os.environ.get("DB_PASSWORD", ""), DB_NAME, port=DB_PORT)
+    track_nrr = nrr_enabled(schema_registry.table(conn, user, "MATCH_RESULTS"),
+                            schema_registry.table(conn, user, "STANDINGS"))
+    drift = verify_standings(conn, track_nrr)
+    for team_id, stored, expected in drift:
+        click.echo(f"team {team_id}: stored={stored} expected={expected}")
+    click.echo(f"{len(drift)} team(s) out of step.")
+    if fix and drift:
+        rebuild_standings(conn, track_nrr)
+        click.echo("STANDINGS rebuilt.")
+    conn.close()
+
+@app.cli.command('ingest')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def ingest_command(path):
+    """Fold a JSON-lines file of deliveries into PLAYER_STATS and flush.
+
+    Uses the DB_USER / DB_PASSWORD environment variables.
+    """
+    user, password = os.environ.get("DB_USER", "root"), os.environ.get("DB_PASSWORD", "")
+    connect = lambda: pool.acquire(DB_HOST, user, password, DB_NAME, port=DB_PORT)
+    reports = []
+
+    def add(pairs):
+        _, _, errors, report = ingestor.add(pairs, connect)
+        for line_no, error in errors:
+            click.echo(f"line {line_no}: {error}")
+        if report:
+            reports.append(report)
+
+    with open(path, 'rb') as f:
+        pairs = []
+        for line_no, record, error in read_records(FileStorage(stream=f), 'jsonl'):
+            if error:
+                click.echo(f"line {line_no}: {error}")
+                continue
+            pairs.append((line_no, record))
+            if len(pairs) >= ingestor.flush_size:
+                add(pairs)
+                pairs = []
+        add(pairs)
+    reports.append(ingestor.flush(connect))
+    click.echo(f"{sum(r.events for r in reports)} new event(s) folded into PLAYER_STATS, "
+               f"{sum(r.replayed for r in reports)} already ingested, "
+               f"{sum(r.unknown for r in reports)} skipped for unknown players.")
+
+# ------------------- PRODUCTION SERVER -------------------
+# Pooled connections each worker opens for DB_USER before taking requests.
+POOL_WARM = int(os.environ.get("POOL_WARM", 2))
+
+def use_shared_caches(cache_dir):
+    """Swap the in-process aggregate/page caches and the session store for FileCaches under ``cache_dir`` (before forking)."""
+    global aggregate_cache, page_cache
+    aggregate_cache = make_aggregate_cache(cache_dir)
+    app.session_interface.store = make_cache('sessions', SESSION_TTL, SESSION_MAX, cache_dir)
+    page_cache = make_page_cache(cache_dir)
+
+def warm_worker():
+    """Open POOL_WARM connections and load the schema and search index as DB_USER."""
+    sync_local_stores()  # baseline, so the first request doesn't drop what we warm up
+    user = os.environ.get("DB_USER")
+    if not user:
+        return
+    password = os.environ.get("DB_PASSWORD", "")
+    conns = []
+    try:
+        for _ in range(min(POOL_WARM, pool.max_size)):
+            conns.append(pool.acquire(DB_HOST, user, password, DB_NAME, port=DB_PORT))
+        if conns:
+            schema_registry.tables(conns[0], user)
+            search_index.ensure(lambda: pool.acquire(DB_HOST, user, password, DB_NAME, port=DB_PORT))
+    except mysql.connector.Error as e:
+        print("Worker warmup failed:", e)
+    finally:
+        for conn in conns:
+            conn.close()
+
+@app.cli.command('serve')
+@click.option('--bind', default='127.0.0.1:8000', show_default=True, help="Address to listen on (host:port).")
+@click.option('--workers', type=int, default=lambda: int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+              help="Worker processes [default: WEB_CONCURRENCY or CPU count].")
+@click.option('--threads', type=int, default=4, show_default=True, help="Threads per worker.")
+@click.option('--timeout', type=int, default=60, show_default=True, help="Seconds before a silent worker is restarted.")
+@click.option('--cache-dir', envvar='CACHE_DIR', help="Directory for the shared caches [default: a new private directory under /dev/shm or the temp dir when --workers > 1].")
+def serve_command(bind, workers, threads, timeout, cache_dir):
+    """Run the app under gunicorn with warmed-up, pool-aware workers.
+
+    Each worker opens its own pool after the fork and warms it for
+    DB_USER / DB_PASSWORD when those are set.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise click.ClickException("gunicorn is not installed; pip install gunicorn")
+
+    if cache_dir is None and workers > 1 and not CACHE_DIR:
+        # A fresh private directory: a fixed name under /dev/shm could be created by someone else first.
+        base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        cache_dir = tempfile.mkdtemp(prefix='cricket-league-', dir=base)
+        master = os.getpid()
+        atexit.register(lambda: os.getpid() == master and shutil.rmtree(cache_dir, ignore_errors=True))
+    if cache_dir:
+        use_shared_caches(cache_dir)
+    if pool.max_size < threads:
+        click.echo(f"Note: POOL_SIZE={pool.max_size} is below --threads={threads}; requests may wait for connections.")
+
+    options = {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'timeout': timeout,
+        'accesslog': '-',
+        'post_fork': lambda server, worker: warm_worker(),
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Server().run()
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class RoleCache:
+    """Role per (user, password) for ``ttl`` seconds, so a repeat login skips the DB.
+
+    Entries are keyed by an HMAC of the credentials under a per-process
+    random key; no password is kept, and a wrong password is simply a miss.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._secret = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._roles = {}  # digest -> (expires_at, role)
+        self.hits = 0
+        self.misses = 0
+
+    def _digest(self, user, password):
+        return hmac.new(self._secret, f"{user}\0{password}".encode(), hashlib.sha256).digest()
+
+    def get(self, user, password):
+        digest = self._digest(user, password)
+        with self._lock:
+            entry = self._roles.get(digest)
+            if entry is None or entry[0] < time.monotonic():
+                self._roles.pop(digest, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user, password, role):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._roles) > 1024:
+                self._roles = {d: e for d, e in self._roles.items() if e[0] >= now}
+            self._roles[self._digest(user, password)] = (now + self.ttl, role)
+
+
+def xor(data, pad):
+    return bytes(a ^ b for a, b in zip(data, pad))
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session data kept on the server; the cookie carries ``sid`` and the password's pad.
+
+    The password is stored XORed with a random one-time pad that only the
+    client's cookie holds, so the session store (which may be files shared
+    by all workers) never contains a usable credential.
+    """
+
+    def __init__(self, sid, data=None, new=False, pad=None):
+        def on_update(session):
+            session.modified = True
+        super().__init__(data, on_update)
+        self.sid = sid
+        self.pad = pad
+        self.new = new
+        self.modified = False
+        self.previous_sid = None
+
+    @property
+    def password(self):
+        sealed = self.get('sealed_password')
+        if sealed is None or self.pad is None:
+            return None
+        return xor(base64.b64decode(sealed), self.pad).decode(errors='replace')
+
+    def set_password(self, password):
+        data = password.encode()
+        self.pad = secrets.token_bytes(max(64, len(data)))
+        self['sealed_password'] = base64.b64encode(xor(data, self.pad)).decode('ascii')
+
+    def rotate(self):
+        """Switch to a fresh id (call on login so a pre-login id can't be reused)."""
+        if not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask sessions stored in ``store`` (an AggregateCache or FileCache) under an HMAC of their id.
+
+    Sessions live for the store's TTL from their last change. Use a
+    FileCache when several worker processes serve the same users; create
+    the interface before forking so they share the HMAC key.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._secret = secrets.token_bytes(32)
+
+    def _key(self, sid):
+        return ('session', hmac.new(self._secret, sid.encode(), hashlib.sha256).hexdigest())
+
+    def open_session(self, app, request):
+        sid, _, pad = request.cookies.get(self.get_cookie_name(app), '').partition('.')
+        data = self.store.get(self._key(sid)) if sid else None
+        try:
+            pad = base64.urlsafe_b64decode(pad) if pad else None
+        except (ValueError, binascii.Error):
+            data = None
+        if data is None:
+            return ServerSession(secrets.token_urlsafe(32), new=True)
+        return ServerSession(sid, data, pad=pad)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain, path = self.get_cookie_domain(app), self.get_cookie_path(app)
+        if session.previous_sid:
+            self.store.discard(self._key(session.previous_sid))
+        if not session:
+            if session.modified and not session.new:
+                self.store.discard(self._key(session.sid))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+        self.store.set(self._key(session.sid), dict(session), ())
+        value = session.sid
+        if session.pad is not None:
+            value += '.' + base64.urlsafe_b64encode(session.pad).decode('ascii')
+        response.set_cookie(
+            name, value, domain=domain, path=path,
+            httponly=self.get_cookie_httponly(app), secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app), expires=self.get_expiration_time(app, session),
+        )
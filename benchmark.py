@@ -0,0 +1,403 @@
+"""Seed cricket_league with synthetic data and load-test the app's routes.
+
+    python benchmark.py seed --teams 10 --players-per-team 15 --matches 200
+    python benchmark.py run --user root --password secret --concurrency 8 --requests 200 -o run.json
+    python benchmark.py run --url http://127.0.0.1:8000 --server-pid 1234 ...
+
+``run`` drives the Flask test client in-process by default, or a live server
+with --url, and prints one JSON document with p50/p95/p99 latency, throughput
+and RSS per route (at the start, peak while the route ran, and the growth)
+so runs can be diffed over time. ``seed`` refuses to wipe a database that
+already has data unless given --force. Seeding targets a real MySQL server: the app's SQL (stored procedures, DESCRIBE, ON DUPLICATE
+KEY UPDATE, information_schema) has no faithful SQLite equivalent.
+"""
+import argparse
+import datetime
+import http.cookiejar
+import json
+import os
+import random
+import statistics
+import subprocess
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from routing import parse_address
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS TEAMS (
+        team_id INT AUTO_INCREMENT PRIMARY KEY,
+        team_name VARCHAR(100) NOT NULL,
+        coach_name VARCHAR(100),
+        home_city VARCHAR(100)
+    )""",
+    """CREATE TABLE IF NOT EXISTS VENUES (
+        venue_id INT AUTO_INCREMENT PRIMARY KEY,
+        venue_name VARCHAR(100) NOT NULL,
+        city VARCHAR(100),
+        capacity INT
+    )""",
+    """CREATE TABLE IF NOT EXISTS PLAYERS (
+        player_id INT PRIMARY KEY,
+        player_name VARCHAR(100) NOT NULL,
+        DOB DATE,
+        role ENUM('Batsman','Bowler','All-Rounder','Wicket-Keeper'),
+        batting_style VARCHAR(50),
+        bowling_style VARCHAR(50),
+        team_id INT,
+        FOREIGN KEY (team_id) REFERENCES TEAMS(team_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS PLAYERS_CONTACTS (
+        player_id INT,
+        contact_no VARCHAR(20),
+        PRIMARY KEY (player_id, contact_no),
+        FOREIGN KEY (player_id) REFERENCES PLAYERS(player_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS MATCHES (
+        match_id INT AUTO_INCREMENT PRIMARY KEY,
+        home_team_id INT,
+        away_team_id INT,
+        venue_id INT,
+        status ENUM('Scheduled','Completed','Abandoned'),
+        match_type ENUM('League','Playoff','Final'),
+        match_date DATE,
+        FOREIGN KEY (home_team_id) REFERENCES TEAMS(team_id),
+        FOREIGN KEY (away_team_id) REFERENCES TEAMS(team_id),
+        FOREIGN KEY (venue_id) REFERENCES VENUES(venue_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS MATCH_RESULTS (
+        result_id INT AUTO_INCREMENT PRIMARY KEY,
+        match_id INT,
+        winner_team_id INT NULL,
+        man_of_the_match INT,
+        FOREIGN KEY (match_id) REFERENCES MATCHES(match_id),
+        FOREIGN KEY (man_of_the_match) REFERENCES PLAYERS(player_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS PLAYER_STATS (
+        player_id INT PRIMARY KEY,
+        runs_scored INT DEFAULT 0,
+        wickets_taken INT DEFAULT 0,
+        boundaries INT DEFAULT 0,
+        FOREIGN KEY (player_id) REFERENCES PLAYERS(player_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS STANDINGS (
+        team_id INT PRIMARY KEY,
+        matches_played INT DEFAULT 0,
+        wins INT DEFAULT 0,
+        losses INT DEFAULT 0,
+        ties INT DEFAULT 0,
+        points INT DEFAULT 0,
+        net_run_rate DECIMAL(6,3) DEFAULT 0,
+        FOREIGN KEY (team_id) REFERENCES TEAMS(team_id)
+    )""",
+    """CREATE PROCEDURE IF NOT EXISTS add_or_update_player_stats(
+        IN p_player_id INT, IN p_runs INT, IN p_wickets INT, IN p_boundaries INT)
+    BEGIN
+        INSERT INTO PLAYER_STATS (player_id, runs_scored, wickets_taken, boundaries)
+        VALUES (p_player_id, p_runs, p_wickets, p_boundaries)
+        ON DUPLICATE KEY UPDATE runs_scored = runs_scored + p_runs,
+                                wickets_taken = wickets_taken + p_wickets,
+                                boundaries = boundaries + p_boundaries;
+    END""",
+]
+
+ROLES = ('Batsman', 'Bowler', 'All-Rounder', 'Wicket-Keeper')
+
+
+# ------------------- SEED -------------------
+def seed(args):
+    from bulk import merge_player_stats
+    from standings import rebuild
+
+    rng = random.Random(args.seed)
+    host, port = parse_address(args.host)
+    conn = mysql.connector.connect(host=host, port=port, user=args.user, password=args.password)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {args.database}")
+    cursor.execute(f"USE {args.database}")
+    for ddl in SCHEMA:
+        cursor.execute(ddl)
+    tables = ('PLAYER_STATS', 'MATCH_RESULTS', 'STANDINGS', 'MATCHES', 'PLAYERS_CONTACTS', 'PLAYERS', 'VENUES', 'TEAMS')
+    if not args.force:
+        cursor.execute("SELECT " + " + ".join(f"EXISTS(SELECT 1 FROM {t})" for t in tables))
+        if cursor.fetchone()[0]:
+            conn.close()
+            raise SystemExit(f"{args.database} already has data; seeding replaces it. Re-run with --force to wipe it.")
+    for table in tables:
+        cursor.execute(f"DELETE FROM {table}")
+
+    cursor.executemany("INSERT INTO TEAMS (team_name, coach_name, home_city) VALUES (%s, %s, %s)",
+                       [(f"Team {i}", f"Coach {i}", f"City {i}") for i in range(args.teams)])
+    cursor.execute("SELECT team_id FROM TEAMS")
+    teams = [r[0] for r in cursor.fetchall()]
+    cursor.executemany("INSERT INTO VENUES (venue_name, city, capacity) VALUES (%s, %s, %s)",
+                       [(f"Ground {i}", f"City {i}", rng.randint(10000, 90000)) for i in range(args.venues)])
+    cursor.execute("SELECT venue_id FROM VENUES")
+    venues = [r[0] for r in cursor.fetchall()]
+
+    players = {}
+    rows = []
+    player_id = 1
+    for team in teams:
+        players[team] = []
+        for _ in range(args.players_per_team):
+            rows.append((player_id, f"Player {player_id}", datetime.date(1990, 1, 1) + datetime.timedelta(days=rng.randint(0, 5000)),
+                         rng.choice(ROLES), rng.choice(('Right', 'Left')), rng.choice(('Pace', 'Spin', None)), team))
+            players[team].append(player_id)
+            player_id += 1
+    cursor.executemany("INSERT INTO PLAYERS (player_id, player_name, DOB, role, batting_style, bowling_style, team_id) "
+                       "VALUES (%s, %s, %s, %s, %s, %s, %s)", rows)
+    cursor.executemany("INSERT INTO PLAYERS_CONTACTS (player_id, contact_no) VALUES (%s, %s)",
+                       [(r[0], f"+91{rng.randint(7000000000, 9999999999)}") for r in rows])
+
+    start = datetime.date(2024, 3, 1)
+    matches = []
+    for i in range(args.matches):
+        home, away = rng.sample(teams, 2)
+        matches.append((home, away, rng.choice(venues), 'Completed', 'League', start + datetime.timedelta(days=i // 2)))
+    cursor.executemany("INSERT INTO MATCHES (home_team_id, away_team_id, venue_id, status, match_type, match_date) "
+                       "VALUES (%s, %s, %s, %s, %s, %s)", matches)
+    cursor.execute("SELECT match_id, home_team_id, away_team_id FROM MATCHES")
+    results = []
+    deltas = {}
+    for match_id, home, away in cursor.fetchall():
+        winner = rng.choice((home, away, home, away, None))
+        squad = players[home] + players[away]
+        results.append((match_id, winner, rng.choice(squad)))
+        for pid in rng.sample(squad, min(args.stats_per_match, len(squad))):
+            runs = rng.randint(0, 90)
+            totals = deltas.setdefault(pid, [0, 0, 0])
+            totals[0] += runs
+            totals[1] += rng.randint(0, 3)
+            totals[2] += runs // 10
+        if len(deltas) >= 1000:
+            merge_player_stats(cursor, deltas)
+            deltas = {}
+    merge_player_stats(cursor, deltas)
+    cursor.executemany("INSERT INTO MATCH_RESULTS (match_id, winner_team_id, man_of_the_match) VALUES (%s, %s, %s)", results)
+    conn.commit()
+    cursor.close()
+    rebuild(conn)
+    conn.close()
+    print(json.dumps({'teams': len(teams), 'players': player_id - 1, 'matches': len(matches)}))
+
+
+# ------------------- CLIENTS -------------------
+class TestClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        body = response.get_data()  # drains streamed responses too
+        return response.status_code, body
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+# ------------------- SCENARIOS -------------------
+def read_scenarios():
+    from views import VIEW_QUERIES
+    scenarios = [
+        ('dashboard', lambda c: c.request('GET', '/dashboard')),
+        ('stats', lambda c: c.request('GET', '/stats')),
+        ('viewdb', lambda c: c.request('GET', '/viewdb')),
+    ]
+    for view in sorted(VIEW_QUERIES):
+        scenarios.append((f'viewdb/{view}', lambda c, v=view: c.request('GET', f'/viewdb/{v}')))
+    for table in ('PLAYERS', 'MATCHES', 'PLAYER_STATS'):
+        scenarios.append((f'table_read/{table}', lambda c, t=table: c.request('GET', f'/table/{t}/read')))
+    return scenarios
+
+
+def crud_flow(client):
+    """Insert, update and delete one VENUES row through the form routes."""
+    name = f"bench-{threading.get_ident()}-{time.perf_counter_ns()}"
+    status, _ = client.request('POST', '/table/VENUES/insert', {'venue_name': name, 'city': 'Bench', 'capacity': '1'})
+    if status != 200:
+        return status, b''
+    status, body = client.request('POST', '/query', {'sql': f"SELECT venue_id FROM VENUES WHERE venue_name = '{name}'"})
+    marker = b'<td>'
+    start = body.find(marker)
+    if start < 0:
+        return 500, b''
+    venue_id = body[start + len(marker):body.find(b'</td>', start)].decode().strip()
+    client.request('POST', '/table/VENUES/update', {'action': 'do_update', 'selected_id': venue_id, 'capacity': '2'})
+    return client.request('POST', '/table/VENUES/delete', {'selected_id': venue_id, 'confirm': 'yes'})
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def rss_kb(server_pid):
+    """Current resident set size of the server (or this process), from /proc; None elsewhere."""
+    try:
+        with open(f"/proc/{server_pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler:
+    """Highest RSS seen while a scenario runs (the process-wide high-water mark never goes down)."""
+
+    def __init__(self, server_pid, interval=0.01):
+        self.server_pid = server_pid
+        self.interval = interval
+        self.start_kb = self.peak_kb = rss_kb(server_pid)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            current = rss_kb(self.server_pid)
+            if current is not None and self.peak_kb is not None:
+                self.peak_kb = max(self.peak_kb, current)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end_kb = rss_kb(self.server_pid)
+
+
+def run_scenario(make_client, name, action, args):
+    local = threading.local()
+
+    def one(_):
+        if not hasattr(local, 'client'):
+            local.client = make_client()
+        started = time.perf_counter()
+        status, _ = action(local.client)
+        return time.perf_counter() - started, status
+
+    began = time.perf_counter()
+    with RssSampler(args.server_pid) as rss, ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        samples = list(executor.map(one, range(args.requests)))
+    wall = time.perf_counter() - began
+    growth = rss.peak_kb - rss.start_kb if rss.start_kb is not None else None
+    latencies = [s[0] * 1000 for s in samples]
+    errors = sum(1 for s in samples if s[1] >= 400)
+    return {
+        'route': name,
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / wall, 2) if wall else None,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'rss_start_kb': rss.start_kb,
+        'peak_rss_kb': rss.peak_kb,
+        'rss_growth_kb': growth,
+    }
+
+
+def run(args):
+    if args.url:
+        def make_client():
+            client = HttpClient(args.url)
+            client.request('POST', '/', {'user': args.user, 'password': args.password})
+            return client
+    else:
+        # app reads the primary address at import; point it at the server we seeded.
+        os.environ['DB_PRIMARY_HOST'] = args.host
+        from app import app
+
+        def make_client():
+            client = TestClient(app)
+            client.request('POST', '/', {'user': args.user, 'password': args.password})
+            return client
+
+    scenarios = [('login', lambda c: c.request('POST', '/', {'user': args.user, 'password': args.password}))]
+    scenarios += read_scenarios()
+    if not args.skip_writes:
+        scenarios.append(('crud/VENUES', crud_flow))
+    if args.only:
+        scenarios = [s for s in scenarios if s[0] in args.only]
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    report = {
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'target': args.url or 'flask-test-client',
+        'concurrency': args.concurrency,
+        'requests_per_route': args.requests,
+        'routes': [run_scenario(make_client, name, action, args) for name, action in scenarios],
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default=os.environ.get('DB_PRIMARY_HOST', 'localhost'),
+                        help='host[:port], as in the app\'s DB_PRIMARY_HOST')
+    parser.add_argument('--user', default=os.environ.get('DB_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('DB_PASSWORD', ''))
+    parser.add_argument('--database', default='cricket_league')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('seed', help='create the schema (if missing) and replace its data with synthetic rows')
+    p.add_argument('--teams', type=int, default=10)
+    p.add_argument('--players-per-team', type=int, default=15)
+    p.add_argument('--venues', type=int, default=8)
+    p.add_argument('--matches', type=int, default=200)
+    p.add_argument('--stats-per-match', type=int, default=22, help='PLAYER_STATS contributions per match')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--force', action='store_true', help='wipe the database even if it already has data')
+    p.set_defaults(func=seed)
+
+    p = sub.add_parser('run', help='load-test the routes and print a JSON report')
+    p.add_argument('--url', help='benchmark a running server instead of the in-process test client')
+    p.add_argument('--server-pid', type=int, help='sample the RSS of this server process (Linux /proc)')
+    p.add_argument('--concurrency', type=int, default=4)
+    p.add_argument('--requests', type=int, default=100, help='requests per route')
+    p.add_argument('--only', nargs='*', help='route names to run (default: all)')
+    p.add_argument('--skip-writes', action='store_true', help='leave out the insert/update/delete flow')
+    p.add_argument('-o', '--output', help='also write the JSON report to this file')
+    p.set_defaults(func=run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
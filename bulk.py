@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+
+import mysql.connector
+
+from records import record_class
+
+# Only the first few failures are listed on the result page; the rest are counted.
+MAX_REPORTED_ERRORS = 100
+
+STAT_FIELDS = ('runs_scored', 'wickets_taken', 'boundaries')
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.chunks = 0
+        self.error_count = 0
+        self.errors = []  # (line_no, message)
+
+    def error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, message))
+
+
+def read_records(file_storage, fmt):
+    """Yield (line_no, record, error) from an uploaded CSV or JSON-lines file, one row at a time."""
+    stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for line_no, record in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, record, None
+        return
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_records(conn, table, records, chunk_size, on_insert=None, report=None):
+    """Insert ``records`` into ``table`` in chunks of ``chunk_size``, committing per chunk.
+
+    ``on_insert`` is called with the inserted rows (as records) before each commit.
+    ``report.inserted`` only counts committed rows, so a caller that passes its own
+    ImportReport still knows how far the import got if a MySQL error escapes.
+    """
+    columns = [c['Field'] for c in table.insert_columns]
+    apply_chunk = merge_stats_chunk if table.name.upper() == "PLAYER_STATS" else insert_chunk
+    report = report or ImportReport()
+    for chunk in chunked(records, chunk_size):
+        rows = []
+        for line_no, record, error in chunk:
+            if error:
+                report.error(line_no, error)
+                continue
+            unknown = set(record) - set(columns)
+            if unknown:
+                report.error(line_no, f"Unknown column(s): {', '.join(sorted(map(str, unknown)))}")
+                continue
+            values = tuple(None if record.get(c) == "" else record.get(c) for c in columns)
+            rows.append((line_no, values))
+        if rows:
+            apply_chunk(conn, table, columns, rows, report, on_insert)
+        report.chunks += 1
+    return report
+
+
+def insert_chunk(conn, table, columns, rows, report, on_insert=None):
+    sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    make = record_class(table.name, columns)._make
+    cursor = conn.cursor()
+    try:
+        # mysql.connector rewrites a plain INSERT executemany into one multi-row INSERT.
+        cursor.executemany(sql, [values for _, values in rows])
+        if on_insert:
+            on_insert([make(values) for _, values in rows])
+        conn.commit()
+        report.inserted += len(rows)
+    except mysql.connector.Error:
+        conn.rollback()
+        # Replay the chunk row by row so only the offending rows are rejected. The savepoint
+        # undoes a row's INSERT too when on_insert (e.g. the standings delta) fails after it.
+        inserted = 0
+        for line_no, values in rows:
+            cursor.execute("SAVEPOINT import_row")
+            try:
+                cursor.execute(sql, values)
+                if on_insert:
+                    on_insert([make(values)])
+                inserted += 1
+            except mysql.connector.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                report.error(line_no, str(e))
+        conn.commit()
+        report.inserted += inserted
+    cursor.close()
+
+
+def merge_player_stats(cursor, deltas):
+    """Add {player_id: (runs, wickets, boundaries)} onto PLAYER_STATS in one multi-row upsert."""
+    rows = [(player_id,) + tuple(totals) for player_id, totals in deltas.items()]
+    if not rows:
+        return
+    sql = (
+        "INSERT INTO PLAYER_STATS (player_id, runs_scored, wickets_taken, boundaries) VALUES "
+        + ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+        + " ON DUPLICATE KEY UPDATE "
+        + ", ".join(f"{f} = {f} + VALUES({f})" for f in STAT_FIELDS)
+    )
+    cursor.execute(sql, [v for row in rows for v in row])
+
+
+def merge_stats_chunk(conn, table, columns, rows, report, on_insert=None):
+    # Fold the chunk per player first, so each player costs one row of one statement.
+    make = record_class(table.name, columns)._make
+    deltas = {}
+    lines = {}
+    for line_no, values in rows:
+        record = make(values)
+        try:
+            player_id = int(record['player_id'])
+            stats = [int(record.get(f) or 0) for f in STAT_FIELDS]
+        except (KeyError, TypeError, ValueError):
+            report.error(line_no, "player_id, runs_scored, wickets_taken and boundaries must be integers")
+            continue
+        totals = deltas.setdefault(player_id, [0, 0, 0])
+        for i, value in enumerate(stats):
+            totals[i] += value
+        lines.setdefault(player_id, []).append(line_no)
+
+    cursor = conn.cursor()
+    try:
+        merge_player_stats(cursor, deltas)
+        conn.commit()
+        report.inserted += sum(len(v) for v in lines.values())
+    except mysql.connector.Error:
+        conn.rollback()
+        inserted = 0
+        for player_id, totals in deltas.items():
+            try:
+                merge_player_stats(cursor, {player_id: totals})
+                inserted += len(lines[player_id])
+            except mysql.connector.Error as e:
+                for line_no in lines[player_id]:
+                    report.error(line_no, str(e))
+        conn.commit()
+        report.inserted += inserted
+    cursor.close()
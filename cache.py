@@ -0,0 +1,196 @@
+import fcntl
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class AggregateCache:
+    """In-process TTL + LRU cache for query results that depend on a few tables.
+
+    Every entry records the tables it was computed from, so a write to one of
+    those tables can drop exactly the entries that are now stale.
+    """
+
+    def __init__(self, ttl=300, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self._epoch = 0                # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def token(self):
+        """Take before computing a value; ``set(..., token=...)`` then skips it if a write landed meanwhile."""
+        return self._epoch
+
+    def set(self, key, value, tables, token=None):
+        tables = frozenset(t.upper() for t in tables)
+        with self._lock:
+            if token is not None and token != self._epoch:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, tables, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, table_name):
+        table_name = table_name.upper()
+        with self._lock:
+            self._epoch += 1
+            stale = [k for k, (_, tables, _) in self._entries.items() if table_name in tables]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+
+def private_directory(path):
+    """Create ``path`` (mode 0700) if needed and refuse it unless only this user can write to it."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Cache directory {path} is not a directory")
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"Cache directory {path} must be owned by uid {os.getuid()} "
+                              f"and not group/other writable")
+    return path
+
+
+class FileCache:
+    """AggregateCache's interface over a directory shared by every worker process.
+
+    Each entry is one JSON file holding the key, expiry, {table: generation}
+    and ``encode(value)``; ``decode`` turns it back into the value. JSON
+    rather than pickle, so a planted file can't run code. ``invalidate``
+    only bumps the table's generation counter, so one write makes the
+    entry stale in all processes without scanning files. Point
+    ``directory`` at tmpfs (/dev/shm) to keep it in memory; it must belong
+    to the app's user and not be writable by anyone else.
+    """
+
+    def __init__(self, directory, ttl=300, max_entries=256, encode=None, decode=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda data: data)
+        private_directory(os.path.join(private_directory(directory), 'entries'))
+        self._lock_path = os.path.join(directory, 'lock')
+        self._sets = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---- generations ----
+    def _counter_path(self, name):
+        return os.path.join(self.directory, f"gen-{name}")
+
+    def _read_counter(self, name):
+        try:
+            with open(self._counter_path(name)) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _bump(self, *names):
+        with open(self._lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            for name in names:
+                self._write_atomic(self._counter_path(name), str(self._read_counter(name) + 1).encode())
+
+    def generations(self, names):
+        """Current counter per name: a table (upper case), '__all__' (clear) or '__epoch__'."""
+        return {t: self._read_counter(t) for t in names}
+
+    def token(self):
+        return self._read_counter('__epoch__')
+
+    # ---- entries ----
+    def _entry_path(self, key):
+        return os.path.join(self.directory, 'entries', hashlib.sha1(repr(key).encode()).hexdigest())
+
+    def _write_atomic(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key):
+        try:
+            with open(self._entry_path(key), 'rb') as f:
+                entry = json.load(f)
+            stale = (entry['key'] != repr(key) or entry['expires_at'] < time.time()
+                     or self.generations(entry['generations']) != entry['generations'])
+            value = None if stale else self.decode(entry['value'])
+        except (OSError, ValueError, KeyError, TypeError):
+            stale = True
+        if stale:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value, tables, token=None):
+        # Generations are read before the token check, so a write landing after
+        # the check still outdates this entry.
+        generations = self.generations(['__all__'] + sorted(t.upper() for t in tables))
+        if token is not None and token != self.token():
+            return
+        data = json.dumps({'key': repr(key), 'expires_at': time.time() + self.ttl,
+                           'generations': generations, 'value': self.encode(value)}).encode()
+        self._write_atomic(self._entry_path(key), data)
+        self._sets += 1
+        if self._sets % 64 == 0:
+            self._trim()
+
+    def _trim(self):
+        # Approximate LRU: drop the oldest files once there are too many.
+        folder = os.path.join(self.directory, 'entries')
+        try:
+            entries = [e for e in os.scandir(folder) if e.is_file()]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def discard(self, key):
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def invalidate(self, table_name):
+        self._bump(table_name.upper(), '__epoch__')
+
+    def clear(self):
+        self._bump('__all__', '__epoch__')
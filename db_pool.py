@@ -0,0 +1,233 @@
+import hashlib
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+
+class PoolTimeout(mysql.connector.Error):
+    """Raised when no pooled connection frees up within the wait timeout."""
+
+
+class PooledConnection:
+    """Proxy around a raw MySQL connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, key, raw):
+        self._pool = pool
+        self._key = key
+        self._raw = raw
+        self._released = False
+        self._discard = False
+        self._reset = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        wrap = self._pool.cursor_wrapper
+        return wrap(cursor) if wrap else cursor
+
+    @property
+    def host(self):
+        return self._key[0]
+
+    @property
+    def port(self):
+        return self._key[4]
+
+    @property
+    def released(self):
+        return self._released
+
+    def discard(self):
+        """Drop the underlying connection instead of reusing it on close()."""
+        self._discard = True
+
+    def reset_on_release(self):
+        """Clear session state (USE, SET, LOCK TABLES, temporary tables, GET_LOCK) before reuse."""
+        self._reset = True
+
+    def close(self):
+        self._pool.release(self)
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pools keyed by (host, user, password, database, port).
+
+    Idle connections older than ``idle_timeout`` are evicted (every key is
+    swept at most once per ``sweep_interval`` seconds), connections idle
+    for more than ``ping_interval`` seconds are pinged on checkout and callers block up to ``wait_timeout`` seconds when
+    ``max_size`` connections for a key are already checked out.
+    ``cursor_wrapper``, if given, wraps every cursor handed out (instrumentation).
+    """
+
+    def __init__(self, max_size=5, idle_timeout=300, wait_timeout=10, ping_interval=0, sweep_interval=60,
+                 cursor_wrapper=None, **connect_args):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        self.wait_timeout = wait_timeout
+        self.cursor_wrapper = cursor_wrapper
+        self.connect_args = connect_args
+        self._lock = threading.Condition()
+        self._idle = {}    # key -> deque of (raw, last_used)
+        self._in_use = {}  # key -> number of checked-out connections
+        self._metrics = {
+            'hits': 0, 'misses': 0, 'waits': 0, 'wait_seconds': 0.0,
+            'timeouts': 0, 'evictions': 0, 'broken': 0, 'errors_on_return': 0,
+        }
+
+    @staticmethod
+    def make_key(host, user, password, database, port=None):
+        digest = hashlib.sha256((password or '').encode()).hexdigest()
+        return (host, user, digest, database, port)
+
+    # ---- checkout ----
+    def acquire(self, host, user, password, database=None, port=None):
+        key = self.make_key(host, user, password, database, port)
+        raw, last_used = self._checkout(key)
+        # A connection handed back moments ago is almost certainly still alive.
+        if raw is not None and time.monotonic() - last_used > self.ping_interval and not self._healthy(raw):
+            self._close_quietly(raw)
+            with self._lock:
+                self._metrics['broken'] += 1
+            raw = None
+        if raw is None:
+            try:
+                extra = {'port': port} if port else {}
+                raw = mysql.connector.connect(host=host, user=user, password=password,
+                                              database=database, **extra, **self.connect_args)
+            except Exception:
+                self._forget(key)
+                raise
+        return PooledConnection(self, key, raw)
+
+    def _checkout(self, key):
+        deadline = None
+        with self._lock:
+            while True:
+                self._sweep()
+                self._evict_idle(key)
+                idle = self._idle.get(key)
+                if idle:
+                    raw, last_used = idle.pop()
+                    self._in_use[key] = self._in_use.get(key, 0) + 1
+                    self._metrics['hits'] += 1
+                    return raw, last_used
+                in_use = self._in_use.get(key, 0)
+                if in_use < self.max_size:
+                    self._in_use[key] = in_use + 1
+                    self._metrics['misses'] += 1
+                    return None, None
+                if deadline is None:
+                    deadline = time.monotonic() + self.wait_timeout
+                    self._metrics['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics['timeouts'] += 1
+                    raise PoolTimeout(msg=f"Timed out waiting for a pooled connection for {key[1]}")
+                started = time.monotonic()
+                self._lock.wait(remaining)
+                self._metrics['wait_seconds'] += time.monotonic() - started
+
+    def _healthy(self, raw):
+        try:
+            raw.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except Exception:
+            return False
+
+    # ---- return ----
+    def release(self, conn):
+        if conn._released:
+            return
+        conn._released = True
+        raw = conn._raw
+        reusable = not conn._discard
+        if reusable:
+            try:
+                if raw.in_transaction:
+                    raw.rollback()
+                if conn._reset:
+                    reusable = self._reset_session(raw, conn._key[3])
+            except Exception:
+                reusable = False
+                with self._lock:
+                    self._metrics['errors_on_return'] += 1
+        with self._lock:
+            self._in_use[conn._key] = max(self._in_use.get(conn._key, 1) - 1, 0)
+            if reusable:
+                self._idle.setdefault(conn._key, deque()).append((raw, time.monotonic()))
+            self._lock.notify()
+        if not reusable:
+            self._close_quietly(raw)
+
+    @staticmethod
+    def _reset_session(raw, database):
+        # COM_RESET_CONNECTION (MySQL 5.7.3+) keeps the current database, so select ours again.
+        if raw.cmd_reset_connection() is False:
+            return False
+        if database:
+            raw.database = database
+        return True
+
+    def _forget(self, key):
+        with self._lock:
+            self._in_use[key] = max(self._in_use.get(key, 1) - 1, 0)
+            self._lock.notify()
+
+    # ---- eviction ----
+    def _evict_idle(self, key):
+        # Caller holds self._lock.
+        idle = self._idle.get(key)
+        if not idle:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        while idle and idle[0][1] < cutoff:
+            raw, _ = idle.popleft()
+            self._metrics['evictions'] += 1
+            self._close_quietly(raw)
+        if not idle and not self._in_use.get(key):
+            del self._idle[key]
+            self._in_use.pop(key, None)
+
+    def _sweep(self):
+        # Caller holds self._lock. Users who don't come back still get their connections closed.
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        for key in list(self._idle):
+            self._evict_idle(key)
+
+    def evict_idle(self):
+        with self._lock:
+            for key in list(self._idle):
+                self._evict_idle(key)
+
+    def close_all(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for raw, _ in idle:
+                    self._close_quietly(raw)
+            self._idle.clear()
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    # ---- metrics ----
+    def stats(self):
+        with self._lock:
+            result = dict(self._metrics)
+            result['idle'] = sum(len(d) for d in self._idle.values())
+            result['in_use'] = sum(self._in_use.values())
+            result['pools'] = len(set(self._idle) | {k for k, v in self._in_use.items() if v})
+        return result
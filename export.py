@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import zlib
+
+from flask import Response, stream_with_context
+
+# Rows pulled from the server per fetchmany() while exporting.
+EXPORT_CHUNK_ROWS = 1000
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def csv_chunks(cursor, chunk_rows=EXPORT_CHUNK_ROWS):
+    columns = [d[0] for d in cursor.description]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        writer.writerows(rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def ndjson_chunks(cursor, chunk_rows=EXPORT_CHUNK_ROWS):
+    columns = [d[0] for d in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        yield ''.join(json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in rows)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(cursor, fmt, filename, gzip=False):
+    """Stream the result set on ``cursor`` (an unbuffered, already executed cursor) as a download."""
+    mimetype, ext = FORMATS.get(fmt, FORMATS['csv'])
+    chunks = ndjson_chunks(cursor) if fmt == 'ndjson' else csv_chunks(cursor)
+
+    def generate():
+        try:
+            encoded = (chunk.encode('utf-8') for chunk in chunks)
+            yield from (gzip_chunks(encoded) if gzip else encoded)
+        finally:
+            cursor.close()
+
+    filename = f"{filename}.{ext}" + (".gz" if gzip else "")
+    if gzip:
+        mimetype = 'application/gzip'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
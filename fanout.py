@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Shared by every request; each task holds one pooled connection while it runs.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='fanout')
+
+
+def with_cursor(fn):
+    """Adapt ``fn(cursor)`` into a fan-out task taking a connection."""
+    def task(conn):
+        cursor = conn.cursor()
+        try:
+            return fn(cursor)
+        finally:
+            cursor.close()
+    return task
+
+
+def _run(connect, task):
+    conn = connect()
+    try:
+        return task(conn)
+    finally:
+        conn.close()
+
+
+def run_parallel(connect, tasks, deadline):
+    """Run independent ``{name: task(conn)}`` queries concurrently.
+
+    Every task gets its own connection from ``connect()``. Returns
+    ``(results, missing)`` where ``missing`` maps the name of each task that
+    failed or was still running at ``deadline`` seconds to a reason; slow
+    tasks keep running in the background and return their connection when
+    they finish.
+    """
+    futures = {name: _executor.submit(_run, connect, task) for name, task in tasks.items()}
+    done, _ = wait(futures.values(), timeout=deadline)
+    results = {}
+    missing = {}
+    for name, future in futures.items():
+        if future not in done:
+            missing[name] = f"timed out after {deadline}s"
+        elif future.exception() is not None:
+            missing[name] = str(future.exception())
+            print("Fan-out task failed:", name, future.exception())
+        else:
+            results[name] = future.result()
+    return results, missing
@@ -0,0 +1,226 @@
+import threading
+import time
+
+import mysql.connector
+
+from bulk import merge_player_stats
+
+# Event IDs already folded into PLAYER_STATS; replays of these are skipped.
+EVENTS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS INGESTED_EVENTS (
+        event_id VARCHAR(64) PRIMARY KEY,
+        ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Dismissals the bowler is not credited with.
+NON_BOWLER_DISMISSALS = {'run out', 'retired hurt', 'retired out', 'obstructing the field', 'timed out'}
+
+
+def ball_contribution(event):
+    """{player_id: (runs, wickets, boundaries)} that one delivery adds; raises ValueError if malformed.
+
+    An event looks like {"event_id": "m12-1.3", "match_id": 12, "batter_id": 7,
+    "bowler_id": 31, "runs": 4, "extras": 0, "wicket": false, "dismissal": null}.
+    """
+    event_id = event.get('event_id')
+    if event_id in (None, "") or len(str(event_id)) > 64:
+        raise ValueError("event_id is required (at most 64 characters)")
+    try:
+        batter = int(event['batter_id'])
+        bowler = int(event['bowler_id'])
+        runs = int(event.get('runs') or 0)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("batter_id and bowler_id are required; runs must be an integer")
+    if runs < 0:
+        raise ValueError("runs cannot be negative")
+    dismissal = str(event.get('dismissal') or '').lower()
+    wicket = bool(event.get('wicket')) and dismissal not in NON_BOWLER_DISMISSALS
+    # Extras (wides, byes, ...) are not credited to the batter, so only 'runs' counts.
+    boundary = 1 if runs in (4, 6) else 0
+    contribution = {batter: (runs, 0, boundary)}
+    if wicket:
+        previous = contribution.get(bowler, (0, 0, 0))
+        contribution[bowler] = (previous[0], previous[1] + 1, previous[2])
+    return contribution
+
+
+class FlushReport:
+    def __init__(self):
+        self.events = 0       # newly folded into PLAYER_STATS
+        self.replayed = 0     # already ingested by an earlier flush
+        self.unknown = 0      # dropped: batter/bowler not in PLAYERS
+        self.players = 0      # rows touched by the upsert
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class BallIngestor:
+    """Buffer ball-by-ball events and fold them into PLAYER_STATS in batches.
+
+    Events are keyed by event_id, so duplicates inside the buffer collapse
+    and events recorded in INGESTED_EVENTS by an earlier flush are skipped.
+    A flush happens once ``flush_size`` events are buffered, or when the
+    oldest one is ``flush_interval`` seconds old: on the next add(), or from a
+    daemon thread if ``connect`` (a service account's connection factory) is
+    given. Flushes triggered by add() use that caller's credentials, never a
+    previous caller's. ``on_flush(table)`` runs after PLAYER_STATS changes and
+    ``on_schema()`` after the INGESTED_EVENTS table is created. Each flush is one transaction: record the new event IDs, then one
+    multi-row upsert of the per-player deltas. A failed flush keeps the
+    events buffered for the next attempt.
+    """
+
+    def __init__(self, flush_size=500, flush_interval=5, max_buffer=50000, on_flush=None,
+                 on_schema=None, connect=None):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.on_flush = on_flush
+        self.on_schema = on_schema
+        self.connect = connect
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = {}      # event_id -> contribution
+        self._oldest = None
+        self._table_ready = False
+        self._thread = None
+        self.totals = {'accepted': 0, 'duplicates': 0, 'flushes': 0, 'failed_flushes': 0}
+
+    def add(self, events, connect):
+        """Buffer (line_no, event) pairs.
+
+        Returns (accepted, duplicates, errors, report); ``report`` is the
+        FlushReport if this batch triggered a flush, else None.
+        """
+        accepted = duplicates = 0
+        errors = []
+        with self._lock:
+            for line_no, event in events:
+                try:
+                    contribution = ball_contribution(event)
+                except ValueError as e:
+                    errors.append((line_no, str(e)))
+                    continue
+                event_id = str(event['event_id'])
+                if event_id in self._buffer:
+                    duplicates += 1
+                    continue
+                if len(self._buffer) >= self.max_buffer:
+                    errors.append((line_no, "Ingest buffer is full; retry after the next flush"))
+                    continue
+                self._buffer[event_id] = contribution
+                accepted += 1
+            if self._buffer and self._oldest is None:
+                self._oldest = time.monotonic()
+            self.totals['accepted'] += accepted
+            self.totals['duplicates'] += duplicates
+            due = self._due()
+        self._start_timer()
+        report = self.flush(connect) if due else None
+        return accepted, duplicates, errors, report
+
+    def buffered(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def _due(self):
+        # Caller holds self._lock.
+        if len(self._buffer) >= self.flush_size:
+            return True
+        return bool(self.flush_interval and self._oldest is not None
+                    and time.monotonic() - self._oldest >= self.flush_interval)
+
+    def _start_timer(self):
+        if self._thread is None and self.flush_interval and self.connect:
+            self._thread = threading.Thread(target=self._run_timer, name='ball-ingest-flush', daemon=True)
+            self._thread.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(min(self.flush_interval, 1))
+            with self._lock:
+                due = self._buffer and self._due()
+            if due:
+                try:
+                    self.flush(self.connect)
+                except Exception as e:
+                    print("Ball ingest flush failed:", e)
+
+    def flush(self, connect):
+        """Write everything buffered through a connection from ``connect()``; returns a FlushReport."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, {}
+                self._oldest = None
+            if not batch:
+                return FlushReport()
+            created = not self._table_ready
+            try:
+                report = self._write(connect(), batch)
+            except Exception:
+                with self._lock:
+                    # Put the batch back; events added meanwhile win on conflicting IDs.
+                    batch.update(self._buffer)
+                    self._buffer = batch
+                    self._oldest = self._oldest or time.monotonic()
+                    self.totals['failed_flushes'] += 1
+                raise
+            with self._lock:
+                self.totals['flushes'] += 1
+        if created and self.on_schema:
+            self.on_schema()
+        if self.on_flush and report.events:
+            self.on_flush("PLAYER_STATS")
+        return report
+
+    def _write(self, conn, batch):
+        report = FlushReport()
+        cursor = conn.cursor()
+        try:
+            if not self._table_ready:
+                cursor.execute(EVENTS_TABLE_DDL)
+                self._table_ready = True
+            ids = list(batch)
+            cursor.execute(
+                f"SELECT event_id FROM INGESTED_EVENTS WHERE event_id IN ({', '.join(['%s'] * len(ids))}) FOR UPDATE;",
+                ids)
+            seen = {row[0] for row in cursor.fetchall()}
+            report.replayed = len(seen)
+            fresh = {event_id: c for event_id, c in batch.items() if event_id not in seen}
+
+            players = {pid for c in fresh.values() for pid in c}
+            known = set()
+            if players:
+                cursor.execute(
+                    f"SELECT player_id FROM PLAYERS WHERE player_id IN ({', '.join(['%s'] * len(players))});",
+                    list(players))
+                known = {int(row[0]) for row in cursor.fetchall()}
+
+            deltas = {}
+            recorded = []
+            for event_id, contribution in fresh.items():
+                # Leave events for unknown players unrecorded so a later replay can still count them.
+                if not set(contribution) <= known:
+                    report.unknown += 1
+                    continue
+                recorded.append(event_id)
+                for player_id, values in contribution.items():
+                    totals = deltas.setdefault(player_id, [0, 0, 0])
+                    for i, value in enumerate(values):
+                        totals[i] += value
+            if recorded:
+                cursor.execute(
+                    "INSERT INTO INGESTED_EVENTS (event_id) VALUES " + ", ".join(["(%s)"] * len(recorded)),
+                    recorded)
+                merge_player_stats(cursor, deltas)
+            conn.commit()
+            report.events = len(recorded)
+            report.players = len(deltas)
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        return report
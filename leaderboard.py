@@ -0,0 +1,65 @@
+import heapq
+from collections import namedtuple
+from operator import attrgetter
+
+PlayerTotals = namedtuple('PlayerTotals', 'player_id player_name team_id runs wickets boundaries')
+
+PLAYER_TOTALS_QUERY = """
+    SELECT PS.player_id, P.player_name, P.team_id,
+           COALESCE(SUM(PS.runs_scored), 0),
+           COALESCE(SUM(PS.wickets_taken), 0),
+           COALESCE(SUM(PS.boundaries), 0)
+    FROM PLAYER_STATS PS
+    JOIN PLAYERS P ON PS.player_id = P.player_id
+    GROUP BY PS.player_id, P.player_name, P.team_id;
+"""
+
+TEAM_NAMES_QUERY = "SELECT team_id, team_name FROM TEAMS;"
+
+
+class Leaderboard:
+    """Per-player run/wicket/boundary totals fetched once; every ranking is derived in Python."""
+
+    # Tables whose writes make a Leaderboard stale.
+    SOURCE_TABLES = ('PLAYER_STATS', 'PLAYERS', 'TEAMS')
+
+    def __init__(self, players, team_names):
+        self.players = players
+        self.team_names = team_names
+
+    # JSON form for a FileCache (team ids become strings as JSON object keys, so use pairs).
+    def to_json(self):
+        return {'players': [list(p) for p in self.players], 'team_names': list(self.team_names.items())}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls([PlayerTotals(*p) for p in data['players']], {t: name for t, name in data['team_names']})
+
+    # The two queries are independent, so callers may also run them in parallel.
+    @staticmethod
+    def fetch_players(cursor):
+        cursor.execute(PLAYER_TOTALS_QUERY)
+        return [PlayerTotals(pid, name, team_id, int(runs), int(wkts), int(bnd))
+                for pid, name, team_id, runs, wkts, bnd in cursor.fetchall()]
+
+    @staticmethod
+    def fetch_team_names(cursor):
+        cursor.execute(TEAM_NAMES_QUERY)
+        return dict(cursor.fetchall())
+
+    def top(self, field, n):
+        """[(player_name, total)] for the n best players by ``field``."""
+        best = heapq.nlargest(n, self.players, key=attrgetter(field))
+        return [(p.player_name, getattr(p, field)) for p in best]
+
+    def team_runs(self):
+        runs = dict.fromkeys(self.team_names, 0)
+        for p in self.players:
+            if p.team_id in runs:
+                runs[p.team_id] += p.runs
+        return runs
+
+    def top_teams_by_runs(self, n):
+        runs = self.team_runs()
+        best = heapq.nlargest(n, runs.items(), key=lambda item: item[1])
+        return [{'team': self.team_names[team_id], 'runs': total} for team_id, total in best]
@@ -0,0 +1,167 @@
+import bisect
+import logging
+import re
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Ad-hoc /query SQL would otherwise grow the statement table without bound.
+MAX_STATEMENT_LABELS = 200
+
+slow_log = logging.getLogger('cricket.slow_sql')
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (constant memory, Prometheus semantics)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+# Quoted strings and numbers: values (passwords, names) that must not reach labels or logs.
+LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|\b\d+(?:\.\d+)?\b")
+
+
+def statement_label(sql):
+    return re.sub(r"\s+", " ", LITERAL.sub("?", str(sql))).strip()[:120]
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+class Metrics:
+    def __init__(self, slow_query_seconds=0.5):
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self.requests = {}       # route -> Histogram
+        self.responses = {}      # (route, status) -> count
+        self.statements = {}     # label -> Histogram
+        self.statement_rows = {}  # label -> rows returned/affected
+        self.fetch_seconds = {}  # label -> time spent fetching rows
+        self.slow_queries = 0
+
+    def observe_request(self, route, status, seconds):
+        with self._lock:
+            self.requests.setdefault(route, Histogram()).observe(seconds)
+            self.responses[(route, status)] = self.responses.get((route, status), 0) + 1
+
+    def _label(self, sql):
+        label = statement_label(sql)
+        if label not in self.statements and len(self.statements) >= MAX_STATEMENT_LABELS:
+            return 'other'
+        return label
+
+    def observe_statement(self, sql, seconds):
+        with self._lock:
+            label = self._label(sql)
+            self.statements.setdefault(label, Histogram()).observe(seconds)
+            if seconds >= self.slow_query_seconds:
+                self.slow_queries += 1
+        if seconds >= self.slow_query_seconds:
+            slow_log.warning("slow query (%.3fs): %s", seconds, statement_label(sql))
+        return label
+
+    def add_rows(self, label, rows, seconds=0.0):
+        with self._lock:
+            self.statement_rows[label] = self.statement_rows.get(label, 0) + rows
+            self.fetch_seconds[label] = self.fetch_seconds.get(label, 0.0) + seconds
+
+    def instrument(self, cursor):
+        return InstrumentedCursor(cursor, self)
+
+    def render(self, extra=None):
+        """Prometheus text exposition; ``extra`` is {metric_name: value} for plain gauges."""
+        out = []
+        with self._lock:
+            out.append('# TYPE http_request_duration_seconds histogram')
+            for route, hist in sorted(self.requests.items()):
+                out.extend(hist.lines('http_request_duration_seconds', f'route="{escape(route)}"'))
+            out.append('# TYPE http_responses_total counter')
+            for (route, status), n in sorted(self.responses.items()):
+                out.append(f'http_responses_total{{route="{escape(route)}",status="{status}"}} {n}')
+            out.append('# TYPE sql_statement_duration_seconds histogram')
+            for label, hist in sorted(self.statements.items()):
+                out.extend(hist.lines('sql_statement_duration_seconds', f'statement="{escape(label)}"'))
+            out.append('# TYPE sql_statement_rows_total counter')
+            for label, n in sorted(self.statement_rows.items()):
+                out.append(f'sql_statement_rows_total{{statement="{escape(label)}"}} {n}')
+            out.append('# TYPE sql_fetch_seconds_total counter')
+            for label, n in sorted(self.fetch_seconds.items()):
+                out.append(f'sql_fetch_seconds_total{{statement="{escape(label)}"}} {n:.6f}')
+            out.append('# TYPE sql_slow_queries_total counter')
+            out.append(f'sql_slow_queries_total {self.slow_queries}')
+        for name, value in sorted((extra or {}).items()):
+            out.append(f'{name} {value}')
+        return '\n'.join(out) + '\n'
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times execute() and counts the rows each statement produces."""
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._label = None
+        self.label_as = None  # fixed label for ad-hoc SQL, instead of the statement text
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, method, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            self._label = self._metrics.observe_statement(self.label_as or operation, time.perf_counter() - started)
+            if self._cursor.description is None and self._cursor.rowcount and self._cursor.rowcount > 0:
+                self._metrics.add_rows(self._label, self._cursor.rowcount)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def _fetched(self, rows, started):
+        if self._label is not None:
+            self._metrics.add_rows(self._label, rows, time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(1 if row is not None else 0, started)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(len(rows), started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(len(rows), started)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
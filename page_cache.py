@@ -0,0 +1,76 @@
+import base64
+import gzip
+import hashlib
+from collections import namedtuple
+
+from flask import Response
+
+# Smaller pages are not worth a gzip copy.
+GZIP_MIN_BYTES = 1024
+
+CachedPage = namedtuple('CachedPage', 'body gzipped etag')
+
+
+def encode_page(page):
+    """JSON-able form of a CachedPage, for a FileCache."""
+    return {'body': base64.b64encode(page.body).decode('ascii'),
+            'gzipped': base64.b64encode(page.gzipped).decode('ascii') if page.gzipped is not None else None,
+            'etag': page.etag}
+
+
+def decode_page(data):
+    gzipped = base64.b64decode(data['gzipped']) if data['gzipped'] is not None else None
+    return CachedPage(base64.b64decode(data['body']), gzipped, data['etag'])
+
+
+class PageCache:
+    """Rendered HTML pages with content-hash ETags, tagged by the tables they show.
+
+    ``store`` is an AggregateCache (per process) or a FileCache shared by
+    all workers; it does the per-table invalidation. Take ``token()`` before
+    rendering so a page rendered while a write was in flight is not stored.
+    """
+
+    def __init__(self, store):
+        self._pages = store
+
+    def token(self):
+        return self._pages.token()
+
+    def get(self, key):
+        return self._pages.get(key)
+
+    def store(self, key, html, tables, token):
+        body = html.encode('utf-8')
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        page = CachedPage(body, gzipped, hashlib.sha1(body).hexdigest())
+        self._pages.set(key, page, tables, token)
+        return page
+
+    def invalidate(self, table_name):
+        self._pages.invalidate(table_name)
+
+    def clear(self):
+        self._pages.clear()
+
+    @property
+    def hits(self):
+        return self._pages.hits
+
+    @property
+    def misses(self):
+        return self._pages.misses
+
+
+def cached_response(page, request):
+    """Serve ``page``, gzipped if the client accepts it, as a 304 if its ETag still matches."""
+    use_gzip = page.gzipped is not None and 'gzip' in request.accept_encodings
+    response = Response(page.gzipped if use_gzip else page.body, mimetype='text/html')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    # Each encoding is a different representation, so it needs its own ETag.
+    response.set_etag(page.etag + ('-gz' if use_gzip else ''))
+    response.headers['Vary'] = 'Accept-Encoding, Cookie'
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -0,0 +1,77 @@
+import base64
+import json
+from collections import namedtuple
+
+Page = namedtuple('Page', 'columns rows size next_token prev_token')
+
+
+def encode_token(value):
+    raw = json.dumps([value], default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token):
+    """The key value inside a token from encode_token; ValueError for anything else."""
+    if not token:
+        return None
+    value = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    if not (isinstance(value, list) and len(value) == 1
+            and (value[0] is None or isinstance(value[0], (str, int, float)))):
+        raise ValueError("Malformed page token")
+    return value[0]
+
+
+def fetch_page(cursor, table_name, pk, size, after=None, before=None):
+    """One keyset page of ``table_name`` ordered by its single-column primary key.
+
+    ``after``/``before`` are decoded cursor values from a previous page; only
+    ``size + 1`` rows are ever read, however large the table is.
+    """
+    if before is not None:
+        cursor.execute(f"SELECT * FROM {table_name} WHERE {pk} < %s ORDER BY {pk} DESC LIMIT %s;",
+                       (before, size + 1))
+        rows = cursor.fetchall()
+        has_prev, has_next = len(rows) > size, True
+        rows = rows[:size][::-1]
+    else:
+        if after is not None:
+            cursor.execute(f"SELECT * FROM {table_name} WHERE {pk} > %s ORDER BY {pk} LIMIT %s;",
+                           (after, size + 1))
+        else:
+            cursor.execute(f"SELECT * FROM {table_name} ORDER BY {pk} LIMIT %s;", (size + 1,))
+        rows = cursor.fetchall()
+        has_prev, has_next = after is not None, len(rows) > size
+        rows = rows[:size]
+    columns = [d[0] for d in cursor.description] if cursor.description else []
+    key = columns.index(pk)
+    next_token = encode_token(rows[-1][key]) if rows and has_next else None
+    prev_token = encode_token(rows[0][key]) if rows and has_prev else None
+    return Page(columns, rows, size, next_token, prev_token)
+
+
+def slice_page(columns, rows, size, after=None, before=None):
+    """A Page over an in-memory row list; tokens carry row offsets instead of key values."""
+    if before is not None:
+        start = max(_offset(before) - size, 0)
+    else:
+        start = _offset(after)
+    end = min(start + size, len(rows))
+    next_token = encode_token(end) if end < len(rows) else None
+    prev_token = encode_token(start) if start > 0 else None
+    return Page(columns, rows[start:end], size, next_token, prev_token)
+
+
+def _offset(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def iter_rows(cursor):
+    """Yield rows straight off an unbuffered cursor, closing it when done."""
+    try:
+        for row in cursor:
+            yield row
+    finally:
+        cursor.close()
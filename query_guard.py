@@ -0,0 +1,62 @@
+import re
+
+SELECT_PATTERN = re.compile(r"^\s*select\b", re.IGNORECASE)
+
+
+def is_select(sql):
+    return bool(SELECT_PATTERN.match(sql))
+
+
+def with_time_limit(sql, max_ms):
+    """Add a MAX_EXECUTION_TIME optimizer hint to a SELECT (a no-op comment on servers without it)."""
+    return SELECT_PATTERN.sub(f"SELECT /*+ MAX_EXECUTION_TIME({int(max_ms)}) */", sql, count=1)
+
+
+def estimate_rows(cursor, sql):
+    """Rows MySQL expects to examine for ``sql``: the product of EXPLAIN's rows x filtered per table."""
+    cursor.execute(f"EXPLAIN {sql}")
+    columns = [d[0].lower() for d in cursor.description]
+    rows_idx = columns.index('rows')
+    filtered_idx = columns.index('filtered') if 'filtered' in columns else None
+    estimate = 1.0
+    for row in cursor.fetchall():
+        rows = float(row[rows_idx] or 1)
+        if filtered_idx is not None and row[filtered_idx] is not None:
+            rows *= float(row[filtered_idx]) / 100
+        estimate *= max(rows, 1.0)
+    return int(estimate)
+
+
+class RowStream:
+    """Yield at most ``cap`` rows off an unbuffered cursor.
+
+    If the cap is hit, or the consumer stops early (e.g. the client
+    disconnected mid-stream), ``cancel()`` is called instead of draining the
+    rest of the result set. ``truncated`` is set once iteration has finished.
+    """
+
+    def __init__(self, cursor, cap, cancel):
+        self.cursor = cursor
+        self.cap = cap
+        self.cancel = cancel
+        self.truncated = False
+        self.count = 0
+
+    def __iter__(self):
+        finished = False
+        try:
+            while True:
+                row = self.cursor.fetchone()
+                if row is None:
+                    finished = True
+                    break
+                if self.count >= self.cap:
+                    self.truncated = True
+                    break
+                self.count += 1
+                yield row
+        finally:
+            if finished:
+                self.cursor.close()
+            else:
+                self.cancel()
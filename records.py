@@ -0,0 +1,81 @@
+import threading
+from collections import namedtuple
+
+# Class names for the tables the app reasons about; any other table gets a
+# record class named after itself.
+RECORD_NAMES = {
+    "PLAYERS": "Player",
+    "TEAMS": "Team",
+    "MATCHES": "Match",
+    "MATCH_RESULTS": "MatchResult",
+    "PLAYER_STATS": "PlayerStats",
+}
+
+_lock = threading.Lock()
+_classes = {}  # (table, columns) -> record class
+
+
+class RecordMixin:
+    """Name-based access on top of a namedtuple row.
+
+    ``row['match_id']`` and ``row.get('winner_team_id')`` work like they did
+    on dictionary cursors, while the row itself stays a slotted tuple.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def has(self, key):
+        return key in self._index
+
+    def keys(self):
+        return self._columns
+
+    def items(self):
+        return zip(self._columns, self)
+
+    def replace(self, changes):
+        """Copy with ``changes`` ({column: value}) applied; unknown columns are ignored."""
+        values = list(self)
+        for key, value in changes.items():
+            if key in self._index:
+                values[self._index[key]] = value
+        return self._make(values)
+
+
+def record_class(table_name, columns):
+    """Record class for ``table_name`` rows with these column names (built once, then reused)."""
+    key = (table_name.upper(), tuple(columns))
+    cls = _classes.get(key)
+    if cls is None:
+        name = RECORD_NAMES.get(key[0]) or key[0].title().replace('_', '')
+        # rename=True keeps aliases like 'Net Run Rate' usable; name access goes through _index.
+        base = namedtuple(name, columns, rename=True)
+        cls = type(name, (RecordMixin, base), {
+            '__slots__': (),
+            '_columns': key[1],
+            '_index': {c: i for i, c in enumerate(key[1])},
+        })
+        with _lock:
+            cls = _classes.setdefault(key, cls)
+    return cls
+
+
+def from_dict(table_name, values):
+    """Record built from a {column: value} dict, e.g. a submitted form."""
+    return record_class(table_name, list(values))._make(values.values())
+
+
+def fetch_records(cursor, table_name):
+    if cursor.description is None:
+        return []
+    make = record_class(table_name, [d[0] for d in cursor.description])._make
+    return [make(row) for row in cursor.fetchall()]
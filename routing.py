@@ -0,0 +1,121 @@
+import itertools
+import threading
+import time
+
+import mysql.connector
+
+DEFAULT_PORT = 3306
+
+# "Access denied; you need the REPLICATION CLIENT privilege": lag can't be measured.
+ER_SPECIFIC_ACCESS_DENIED = 1227
+
+
+def parse_address(value, default_port=DEFAULT_PORT):
+    """'db2:3307' -> ('db2', 3307); a bare host gets ``default_port``."""
+    host, sep, port = value.strip().rpartition(':')
+    if not sep:
+        return value.strip(), default_port
+    return host, int(port)
+
+
+def parse_addresses(value):
+    return [parse_address(v) for v in (value or '').split(',') if v.strip()]
+
+
+def replica_lag(cursor):
+    """Seconds behind the primary; None if unknown, inf if replication is stopped."""
+    # SHOW SLAVE STATUS for servers before 8.0.22.
+    for statement in ("SHOW REPLICA STATUS;", "SHOW SLAVE STATUS;"):
+        try:
+            cursor.execute(statement)
+            break
+        except mysql.connector.Error as e:
+            if e.errno == ER_SPECIFIC_ACCESS_DENIED:
+                return None
+            if statement.startswith("SHOW SLAVE"):
+                raise
+    rows = cursor.fetchall()
+    if not rows:
+        return None  # not configured as a replica (e.g. a plain second mysqld)
+    status = dict(zip([d[0] for d in cursor.description], rows[0]))
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return float('inf') if lag is None else float(lag)
+
+
+class ReplicaRouter:
+    """Pick a replica for a read, or None to use the primary.
+
+    Each replica's lag is probed at most every ``check_interval`` seconds.
+    A replica that fails to connect is skipped for ``down_backoff`` seconds.
+    One lagging more than ``max_lag`` is skipped until it catches up, and so
+    is one whose lag can't be measured (no REPLICATION CLIENT grant, or not
+    replicating at all). Read-your-writes is the caller's
+    job (the app pins a session that wrote to the primary for a while).
+    """
+
+    def __init__(self, replicas, max_lag=5, check_interval=5, down_backoff=30):
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.down_backoff = down_backoff
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._status = {a: {'lag': None, 'checked_at': None, 'down_until': 0.0, 'error': None} for a in self.replicas}
+        self.reads = dict.fromkeys(self.replicas, 0)
+        self.fallbacks = 0
+
+    def mark_down(self, address, error):
+        with self._lock:
+            status = self._status[address]
+            status['down_until'] = time.monotonic() + self.down_backoff
+            status['error'] = str(error)
+
+    def read_target(self, probe):
+        """A usable replica address, or None. ``probe(address)`` returns its lag (see replica_lag)."""
+        if not self.replicas:
+            return None
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                address = next(self._cycle)
+            if self._usable(address, probe):
+                with self._lock:
+                    self.reads[address] += 1
+                return address
+        with self._lock:
+            self.fallbacks += 1
+        return None
+
+    def _usable(self, address, probe):
+        now = time.monotonic()
+        with self._lock:
+            status = self._status[address]
+            if status['down_until'] > now:
+                return False
+            due = status['checked_at'] is None or now - status['checked_at'] >= self.check_interval
+            if due:
+                status['checked_at'] = now  # one thread probes; the others use the last result
+        if due:
+            try:
+                lag = probe(address)
+            except mysql.connector.Error as e:
+                self.mark_down(address, e)
+                return False
+            with self._lock:
+                status['lag'], status['error'] = lag, None
+        with self._lock:
+            lag = status['lag']
+        return lag is not None and lag <= self.max_lag
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'replicas': [{
+                    'address': f"{host}:{port}",
+                    'lag': s['lag'] if s['lag'] != float('inf') else 'stopped',
+                    'down': s['down_until'] > now,
+                    'error': s['error'],
+                    'reads': self.reads[(host, port)],
+                } for (host, port), s in self._status.items()],
+                'fallbacks_to_primary': self.fallbacks,
+            }
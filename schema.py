@@ -0,0 +1,131 @@
+import re
+import threading
+import time
+
+COLUMNS_QUERY = """
+    SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, COLUMN_KEY, EXTRA
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = %s
+    ORDER BY TABLE_NAME, ORDINAL_POSITION;
+"""
+
+DDL_PATTERN = re.compile(r"^\s*(create|alter|drop|rename|truncate)\b", re.IGNORECASE)
+READ_ONLY_PATTERN = re.compile(r"^\s*(select|show|desc|describe|explain)\b", re.IGNORECASE)
+QUOTED = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`")
+
+
+def get_primary_key(columns):
+    for col in columns:
+        if col['Key'] == 'PRI':
+            return col['Field']
+    return None
+
+
+def is_auto_increment(col):
+    return 'auto_increment' in (col['Extra'] or '')
+
+
+def parse_enum(type_str):
+    """Parse MySQL ENUM('A','B','C') into a Python list ['A','B','C']"""
+    if type_str and type_str.startswith("enum("):
+        return re.findall(r"'(.*?)'", type_str)
+    return None
+
+
+def is_ddl(sql):
+    return bool(DDL_PATTERN.match(sql))
+
+
+def is_read_only(sql):
+    # A single read statement: one optional trailing semicolon and nothing after it
+    # (a ';' inside a quoted string or identifier doesn't count).
+    return bool(READ_ONLY_PATTERN.match(sql)) and ';' not in QUOTED.sub('', sql).strip().rstrip(';')
+
+
+class TableSchema:
+    """DESCRIBE-style column dicts for one table plus the column lists the CRUD forms need."""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+        self.primary_keys = [c['Field'] for c in columns if c['Key'] == 'PRI']
+        self.pk = get_primary_key(columns)
+        self.insert_columns = [c for c in columns if not is_auto_increment(c)]
+        # PLAYERS.player_id is hand-assigned, so it stays editable; other keys do not.
+        self.editable_columns = []
+        for col in columns:
+            if col['Field'] == self.pk:
+                if name.upper() == "PLAYERS" and self.pk.lower() == "player_id":
+                    self.editable_columns.append(col)
+            elif not is_auto_increment(col):
+                self.editable_columns.append(col)
+
+    @property
+    def single_pk(self):
+        return self.primary_keys[0] if len(self.primary_keys) == 1 else None
+
+    def column_names(self):
+        return [c['Field'] for c in self.columns]
+
+
+class SchemaRegistry:
+    """Process-wide cache of information_schema column metadata.
+
+    One bulk query loads every table of the database. Snapshots are kept per
+    MySQL user (information_schema only shows what that user may see) and are
+    dropped on DDL through /query or after ``max_age`` seconds.
+    """
+
+    def __init__(self, database, max_age=600):
+        self.database = database
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._snapshots = {}  # user -> (loaded_at, {table_name: TableSchema})
+
+    def _load(self, conn):
+        cursor = conn.cursor()
+        cursor.execute(COLUMNS_QUERY, (self.database,))
+        grouped = {}
+        for table, field, col_type, key, extra in cursor.fetchall():
+            grouped.setdefault(table, []).append({
+                'Field': field,
+                'Type': col_type,
+                'Key': key,
+                'Extra': extra,
+                'EnumValues': parse_enum(col_type),
+            })
+        cursor.close()
+        return {name: TableSchema(name, cols) for name, cols in grouped.items()}
+
+    def snapshot(self, conn, user):
+        with self._lock:
+            entry = self._snapshots.get(user)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            entry = (time.monotonic(), self._load(conn))
+            with self._lock:
+                self._snapshots[user] = entry
+        return entry[1]
+
+    def peek_tables(self, user):
+        """Table names from a fresh snapshot, or None if one would have to be loaded."""
+        with self._lock:
+            entry = self._snapshots.get(user)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            return None
+        return sorted(entry[1])
+
+    def tables(self, conn, user):
+        return sorted(self.snapshot(conn, user))
+
+    def table(self, conn, user, table_name):
+        tables = self.snapshot(conn, user)
+        if table_name in tables:
+            return tables[table_name]
+        for name, table in tables.items():
+            if name.lower() == table_name.lower():
+                return table
+        return None
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshots.clear()
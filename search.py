@@ -0,0 +1,170 @@
+import bisect
+import heapq
+import threading
+import unicodedata
+from collections import Counter, namedtuple
+
+# Searchable text per table: (primary key, name columns).
+SEARCH_FIELDS = {
+    "PLAYERS": ("player_id", ("player_name",)),
+    "TEAMS": ("team_id", ("team_name", "coach_name")),
+    "VENUES": ("venue_id", ("venue_name", "city")),
+}
+
+# A fuzzy candidate must share at least this fraction of the query's trigrams.
+MIN_TRIGRAM_OVERLAP = 0.3
+
+# Words and trigrams found in more than this fraction of all entries don't nominate candidates.
+COMMON_FRACTION = 0.2
+
+Entry = namedtuple('Entry', 'table key field text norm grams')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def trigrams(norm):
+    padded = f"  {norm} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class SearchIndex:
+    """In-memory prefix + trigram index over the SEARCH_FIELDS columns.
+
+    Word prefixes come from a sorted token list (bisect), fuzzy and
+    mid-word matches from trigram postings, so a search never reaches
+    MySQL. A table is (re)loaded with one narrow SELECT the first time it
+    is searched after a write to it; ``invalidate`` marks it stale.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}       # table -> [Entry]
+        self._by_gram = {}       # trigram -> set(Entry)
+        self._by_token = {}      # word -> set(Entry)
+        self._tokens = []        # sorted words, for prefix lookups
+        self._stale = set(SEARCH_FIELDS)
+        self._versions = dict.fromkeys(SEARCH_FIELDS, 0)
+
+    # ---- maintenance ----
+    def invalidate(self, table_name):
+        table_name = table_name.upper()
+        if table_name in SEARCH_FIELDS:
+            with self._lock:
+                self._stale.add(table_name)
+                self._versions[table_name] += 1
+
+    def clear(self):
+        for table_name in SEARCH_FIELDS:
+            self.invalidate(table_name)
+
+    def ensure(self, connect):
+        """Reload whichever tables are stale; ``connect`` is only called if one is."""
+        with self._lock:
+            stale = {t: self._versions[t] for t in self._stale}
+        if not stale:
+            return
+        conn = connect()
+        try:
+            for table_name, version in stale.items():
+                entries = self._load(conn, table_name)
+                with self._lock:
+                    self._replace(table_name, entries)
+                    # Keep the stale flag if a write landed while we were reading.
+                    if self._versions[table_name] == version:
+                        self._stale.discard(table_name)
+        finally:
+            conn.close()
+
+    def _load(self, conn, table_name):
+        pk, fields = SEARCH_FIELDS[table_name]
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {pk}, {', '.join(fields)} FROM {table_name};")
+        entries = []
+        for row in cursor.fetchall():
+            for field, text in zip(fields, row[1:]):
+                if text in (None, ""):
+                    continue
+                norm = normalize(text)
+                entries.append(Entry(table_name, row[0], field, str(text), norm, trigrams(norm)))
+        cursor.close()
+        return entries
+
+    def _replace(self, table_name, entries):
+        # Caller holds self._lock.
+        for entry in self._entries.get(table_name, ()):
+            for gram in entry.grams:
+                self._discard(self._by_gram, gram, entry)
+            for word in set(entry.norm.split()):
+                if self._discard(self._by_token, word, entry):
+                    del self._tokens[bisect.bisect_left(self._tokens, word)]
+        self._entries[table_name] = entries
+        for entry in entries:
+            for gram in entry.grams:
+                self._by_gram.setdefault(gram, set()).add(entry)
+            for word in set(entry.norm.split()):
+                if word not in self._by_token:
+                    bisect.insort(self._tokens, word)
+                self._by_token.setdefault(word, set()).add(entry)
+
+    @staticmethod
+    def _discard(postings, key, entry):
+        """Remove ``entry`` from ``postings[key]``; True if that emptied the key."""
+        bucket = postings.get(key)
+        if bucket is None:
+            return False
+        bucket.discard(entry)
+        if not bucket:
+            del postings[key]
+            return True
+        return False
+
+    # ---- queries ----
+    def search(self, query, limit=20, tables=None):
+        """Ranked [{table, id, field, text, score}] for ``query``."""
+        norm = normalize(query)
+        if not norm:
+            return []
+        words = norm.split()
+        grams = trigrams(norm)
+        with self._lock:
+            # Postings shared by a large part of the index ("player", or the
+            # trigram "pla") say little and cost the most, so they only score
+            # candidates found through rarer words and trigrams.
+            common = COMMON_FRACTION * sum(len(e) for e in self._entries.values())
+            word_hits = []
+            for word in set(words):
+                matched = set()
+                i = bisect.bisect_left(self._tokens, word)
+                while i < len(self._tokens) and self._tokens[i].startswith(word):
+                    matched.update(self._by_token[self._tokens[i]])
+                    i += 1
+                word_hits.append(matched)
+            gram_hits = Counter()
+            for gram in grams:
+                postings = self._by_gram.get(gram, ())
+                if len(postings) <= common:
+                    gram_hits.update(postings)
+
+        rare = [hits for hits in word_hits if len(hits) <= common] or word_hits
+        candidates = set().union(*rare)
+        candidates.update(e for e, n in gram_hits.items() if n >= MIN_TRIGRAM_OVERLAP * len(grams))
+        scored = []
+        for entry in candidates:
+            if tables and entry.table not in tables:
+                continue
+            shared = gram_hits.get(entry, 0)
+            prefix_words = sum(1 for hits in word_hits if entry in hits)
+            score = (0.6 * prefix_words / len(word_hits)
+                     + 0.4 * shared / len(grams | entry.grams))
+            if entry.norm == norm:
+                score += 1.0
+            elif entry.norm.startswith(norm):
+                score += 0.5
+            scored.append((round(score, 4), entry))
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], -len(item[1].norm)))
+        return [{'table': e.table, 'id': e.key, 'field': e.field, 'text': e.text, 'score': score}
+                for score, e in best]
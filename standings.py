@@ -0,0 +1,164 @@
+from collections import namedtuple
+
+from records import fetch_records
+
+POINTS_FOR_WIN = 2
+POINTS_FOR_TIE = 1
+
+# Optional score columns on MATCH_RESULTS and the running totals on STANDINGS that
+# net run rate is derived from. NRR is only maintained when both sets exist.
+SCORE_COLUMNS = ('home_runs', 'home_overs', 'away_runs', 'away_overs')
+NRR_COLUMNS = ('runs_for', 'balls_faced', 'runs_against', 'balls_bowled')
+
+COUNT_FIELDS = ('matches_played', 'wins', 'losses', 'ties', 'points')
+
+TeamDelta = namedtuple('TeamDelta', COUNT_FIELDS + NRR_COLUMNS)
+ZERO = TeamDelta(*([0] * len(TeamDelta._fields)))
+
+
+def nrr_enabled(results_table, standings_table):
+    return (set(SCORE_COLUMNS) <= set(results_table.column_names())
+            and set(NRR_COLUMNS) <= set(standings_table.column_names()))
+
+
+def overs_to_balls(overs):
+    """Cricket notation to balls: 19.4 overs -> 118 balls."""
+    if overs in (None, ""):
+        return 0
+    whole, _, part = str(overs).partition('.')
+    return int(whole or 0) * 6 + int(part[:1] or 0)
+
+
+def add(a, b, sign=1):
+    return TeamDelta(*(x + sign * y for x, y in zip(a, b)))
+
+
+def result_deltas(home, away, result, track_nrr=False):
+    """Per-team contribution of one MATCH_RESULTS row (a record) to the table."""
+    winner = result.get('winner_team_id')
+    winner = int(winner) if winner not in (None, "") else None
+    deltas = {}
+    for team in (home, away):
+        won = winner == team
+        tied = winner is None
+        lost = not won and not tied
+        runs_for = runs_against = balls_faced = balls_bowled = 0
+        if track_nrr:
+            side, other = ('home', 'away') if team == home else ('away', 'home')
+            runs_for = int(result.get(f'{side}_runs') or 0)
+            balls_faced = overs_to_balls(result.get(f'{side}_overs'))
+            runs_against = int(result.get(f'{other}_runs') or 0)
+            balls_bowled = overs_to_balls(result.get(f'{other}_overs'))
+        points = POINTS_FOR_WIN if won else POINTS_FOR_TIE if tied else 0
+        deltas[team] = TeamDelta(1, int(won), int(lost), int(tied), points,
+                                 runs_for, balls_faced, runs_against, balls_bowled)
+    return deltas
+
+
+def match_teams(cursor, match_id):
+    cursor.execute("SELECT home_team_id, away_team_id FROM MATCHES WHERE match_id = %s;", (match_id,))
+    row = cursor.fetchone()
+    return (int(row[0]), int(row[1])) if row else None
+
+
+def apply_result_changes(conn, changes, track_nrr=False):
+    """Apply the standings delta of MATCH_RESULTS writes.
+
+    ``changes`` is a list of (old, new) records, None for the missing side of
+    an insert or delete. Only the teams involved are touched, inside the
+    caller's transaction; the caller commits.
+    """
+    cursor = conn.cursor()
+    teams_by_match = {}
+    totals = {}
+    for old, new in changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if not row or row.get('match_id') in (None, ""):
+                continue
+            match_id = row['match_id']
+            if match_id not in teams_by_match:
+                teams_by_match[match_id] = match_teams(cursor, match_id)
+            teams = teams_by_match[match_id]
+            if teams is None:
+                continue
+            for team, delta in result_deltas(teams[0], teams[1], row, track_nrr).items():
+                totals[team] = add(totals.get(team, ZERO), delta, sign)
+    changed = [team for team, delta in totals.items() if delta != ZERO]
+    for team in changed:
+        upsert_team(cursor, team, totals[team], track_nrr)
+    if track_nrr and changed:
+        refresh_nrr(cursor, changed)
+    cursor.close()
+
+
+def upsert_team(cursor, team_id, delta, track_nrr, replace=False):
+    fields = COUNT_FIELDS + (NRR_COLUMNS if track_nrr else ())
+    values = [getattr(delta, f) for f in fields]
+    if replace:
+        assignments = ", ".join(f"{f} = VALUES({f})" for f in fields)
+    else:
+        assignments = ", ".join(f"{f} = {f} + VALUES({f})" for f in fields)
+    cursor.execute(
+        f"INSERT INTO STANDINGS (team_id, {', '.join(fields)}) "
+        f"VALUES (%s, {', '.join(['%s'] * len(fields))}) "
+        f"ON DUPLICATE KEY UPDATE {assignments};",
+        [team_id] + values)
+
+
+def refresh_nrr(cursor, team_ids):
+    cursor.execute(
+        "UPDATE STANDINGS SET net_run_rate = ROUND(COALESCE("
+        "runs_for * 6 / NULLIF(balls_faced, 0) - runs_against * 6 / NULLIF(balls_bowled, 0), 0), 3) "
+        f"WHERE team_id IN ({', '.join(['%s'] * len(team_ids))});",
+        team_ids)
+
+
+# ---- full rebuild, for verification only ----
+def compute_all(conn, track_nrr=False):
+    """Recompute every team's standings from scratch (O(matches))."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT team_id FROM TEAMS;")
+    totals = {int(r[0]): ZERO for r in cursor.fetchall()}
+    cursor.execute("""
+        SELECT MR.*, M.home_team_id, M.away_team_id
+        FROM MATCH_RESULTS MR
+        JOIN MATCHES M ON MR.match_id = M.match_id;
+    """)
+    for row in fetch_records(cursor, "MATCH_RESULTS"):
+        home, away = int(row['home_team_id']), int(row['away_team_id'])
+        for team, delta in result_deltas(home, away, row, track_nrr).items():
+            totals[team] = add(totals.get(team, ZERO), delta)
+    cursor.close()
+    return totals
+
+
+def stored_standings(conn, track_nrr=False):
+    fields = COUNT_FIELDS + (NRR_COLUMNS if track_nrr else ())
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT team_id, {', '.join(fields)} FROM STANDINGS;")
+    stored = {}
+    for row in cursor.fetchall():
+        values = dict(zip(fields, (int(v or 0) for v in row[1:])))
+        stored[int(row[0])] = TeamDelta(**{f: values.get(f, 0) for f in TeamDelta._fields})
+    cursor.close()
+    return stored
+
+
+def verify(conn, track_nrr=False):
+    """[(team_id, stored, expected)] for every team whose stored row disagrees with a rebuild."""
+    expected = compute_all(conn, track_nrr)
+    stored = stored_standings(conn, track_nrr)
+    return [(team, stored.get(team), delta)
+            for team, delta in sorted(expected.items())
+            if stored.get(team, ZERO) != delta]
+
+
+def rebuild(conn, track_nrr=False):
+    cursor = conn.cursor()
+    expected = compute_all(conn, track_nrr)
+    for team, delta in expected.items():
+        upsert_team(cursor, team, delta, track_nrr, replace=True)
+    if track_nrr and expected:
+        refresh_nrr(cursor, list(expected))
+    cursor.close()
+    conn.commit()
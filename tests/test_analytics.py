@@ -0,0 +1,33 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from analytics import PlayerFrame, ResultFrame, home_win_rate, runs_per_team_match, team_records
+
+TEAM_NAMES = {1: "Lions", 2: "Tigers", 3: "Hawks"}
+
+
+def results(rows):
+    return ResultFrame([(i, f"2024-01-{i:02d}") + r for i, r in enumerate(rows, start=1)], TEAM_NAMES)
+
+
+def test_team_records_and_form():
+    frame = results([(1, 2, 1), (2, 1, 2), (1, 3, None), (3, 1, 1)])
+    records = {r['team']: r for r in team_records(frame)}
+    assert (records['Lions']['played'], records['Lions']['wins'], records['Lions']['ties']) == (4, 2, 1)
+    assert records['Lions']['form'] == 'WLTW'
+    assert records['Hawks']['form'] == 'TL'
+    assert home_win_rate(frame) == round(100 * 2 / 3, 1)
+
+
+def test_matches_with_null_teams_are_skipped():
+    frame = results([(1, 2, 1), (None, 2, 2), (1, None, None)])
+    assert len(frame.home) == 1
+    assert frame.team_ids.tolist() == [1, 2, 3]
+
+
+def test_runs_per_match_ignores_players_without_a_team():
+    frame = results([(1, 2, 1), (1, 3, 3)])
+    players = PlayerFrame([(10, "A", 1, 90, 0, 8), (11, "B", None, 500, 0, 40), (12, "C", 2, 30, 1, 2)], TEAM_NAMES)
+    ranked = runs_per_team_match(players, frame)
+    assert [(r['player'], r['matches'], r['average']) for r in ranked] == [("A", 2, 45.0), ("C", 1, 30.0)]
@@ -0,0 +1,82 @@
+from flask import Flask, session
+
+from auth import RoleCache, ServerSession, ServerSessionInterface
+from cache import AggregateCache
+
+
+def make_app():
+    app = Flask(__name__)
+    store = AggregateCache()
+    app.session_interface = ServerSessionInterface(store)
+
+    @app.route('/login/<password>')
+    def login(password):
+        session.rotate()
+        session['user'] = 'scorer'
+        session.set_password(password)
+        return ''
+
+    @app.route('/whoami')
+    def whoami():
+        return f"{session.get('user')}:{session.password}"
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return ''
+    return app, store
+
+
+def test_password_is_sealed_in_the_store():
+    app, store = make_app()
+    client = app.test_client()
+    client.get('/login/s3cret-pw')
+    assert client.get('/whoami').text == 'scorer:s3cret-pw'
+    assert 's3cret-pw' not in repr(list(store._entries.values()))
+    assert 's3cret-pw' not in client.get_cookie('session').value
+
+
+def test_store_without_the_cookie_pad_reveals_nothing():
+    sealed = ServerSession('sid')
+    sealed.set_password('hunter2')
+    thief = ServerSession('sid', dict(sealed))  # the stored data, no pad
+    assert thief.password is None
+    forged = ServerSession('sid', dict(sealed), pad=bytes(len(sealed.pad)))
+    assert forged.password != 'hunter2'
+
+
+def test_login_rotates_the_id_and_logout_forgets_it():
+    app, _ = make_app()
+    client = app.test_client()
+    client.get('/login/a')
+    first = client.get_cookie('session').value
+    client.get('/login/b')
+    second = client.get_cookie('session').value
+    assert first.split('.')[0] != second.split('.')[0]
+    # The pre-login id no longer opens a session.
+    client.set_cookie('session', first)
+    assert client.get('/whoami').text == 'None:None'
+    client.set_cookie('session', second)
+    client.get('/logout')
+    client.set_cookie('session', second)
+    assert client.get('/whoami').text == 'None:None'
+
+
+def test_tampered_pad_is_a_fresh_session():
+    app, _ = make_app()
+    client = app.test_client()
+    client.get('/login/a')
+    sid = client.get_cookie('session').value.split('.')[0]
+    client.set_cookie('session', sid + '.abc')  # not valid base64
+    assert client.get('/whoami').text == 'None:None'
+
+
+def test_role_cache_keys_on_both_credentials():
+    roles = RoleCache(ttl=60)
+    roles.set('viewer1', 'pw', 'viewer')
+    assert roles.get('viewer1', 'pw') == 'viewer'
+    assert roles.get('viewer1', 'wrong') is None
+    assert 'pw' not in repr(roles._roles)
+    expired = RoleCache(ttl=-1)
+    expired.set('u', 'p', 'manager')
+    assert expired.get('u', 'p') is None
@@ -0,0 +1,81 @@
+import io
+from types import SimpleNamespace
+
+import mysql.connector
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from bulk import ImportReport, import_records, read_records
+
+VENUES = SimpleNamespace(name='VENUES', insert_columns=[{'Field': 'venue_name'}, {'Field': 'capacity'}])
+
+
+class FakeConnection:
+    """Commits rows whose venue_name isn't 'bad'; savepoints are tracked, not simulated."""
+
+    def __init__(self, lose_after_commits=None):
+        self.committed, self.pending = [], []
+        self.lose_after_commits = lose_after_commits
+
+    def cursor(self):
+        return self
+
+    def _check(self):
+        if self.lose_after_commits is not None and len(self.committed) >= self.lose_after_commits:
+            raise mysql.connector.OperationalError("Lost connection to MySQL server")
+
+    def executemany(self, sql, rows):
+        self._check()
+        if any(values[0] == 'bad' for values in rows):
+            raise mysql.connector.IntegrityError("Duplicate entry 'bad'")
+        self.pending.extend(rows)
+
+    def execute(self, sql, values=()):
+        self._check()
+        if sql.startswith("INSERT"):
+            if values[0] == 'bad':
+                raise mysql.connector.IntegrityError("Duplicate entry 'bad'")
+            self.pending.append(values)
+
+    def commit(self):
+        self.committed.append(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+def records(*names):
+    return [(line_no, {'venue_name': name, 'capacity': ''}, None) for line_no, name in enumerate(names, start=2)]
+
+
+def test_chunks_commit_and_bad_rows_are_rejected_one_by_one():
+    conn = FakeConnection()
+    report = import_records(conn, VENUES, records('a', 'b', 'bad', 'c', 'd'), chunk_size=2)
+    assert (report.inserted, report.chunks, report.error_count) == (4, 3, 1)
+    assert report.errors[0][0] == 4
+    assert conn.committed == [[('a', None), ('b', None)], [('c', None)], [('d', None)]]
+
+
+def test_unknown_columns_and_reader_errors_are_reported():
+    rows = [(2, {'venue_name': 'a', 'city': 'X'}, None), (3, None, "Invalid JSON")]
+    report = import_records(FakeConnection(), VENUES, rows, chunk_size=10)
+    assert report.inserted == 0 and [line for line, _ in report.errors] == [2, 3]
+
+
+def test_lost_connection_leaves_the_committed_count():
+    report = ImportReport()
+    with pytest.raises(mysql.connector.Error):
+        import_records(FakeConnection(lose_after_commits=1), VENUES, records('a', 'b', 'c', 'd'), 2, report=report)
+    assert report.inserted == 2
+
+
+def test_read_records():
+    upload = FileStorage(stream=io.BytesIO(b'{"venue_name": "a"}\n\n[1]\nnot json\n'))
+    lines = [(line_no, error is None) for line_no, _, error in read_records(upload, 'jsonl')]
+    assert lines == [(1, True), (3, False), (4, False)]
+    upload = FileStorage(stream=io.BytesIO('\ufeffvenue_name,capacity\nLord\'s,31000\n'.encode()))
+    assert [r for _, r, _ in read_records(upload, 'csv')] == [{'venue_name': "Lord's", 'capacity': '31000'}]
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from cache import AggregateCache, FileCache
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / 'aggregate')
+
+
+def test_invalidate_only_drops_entries_tagged_with_the_table(directory):
+    cache = FileCache(directory)
+    cache.set('board', {'runs': 1}, ('PLAYER_STATS', 'PLAYERS'))
+    cache.set('venues', [1, 2], ('VENUES',))
+    cache.invalidate('players')
+    assert cache.get('board') is None
+    assert cache.get('venues') == [1, 2]
+
+
+def test_generations_are_shared_between_instances(directory):
+    # Two FileCaches on one directory stand in for two worker processes.
+    worker_a, worker_b = FileCache(directory), FileCache(directory)
+    worker_a.set('board', 'cached', ('PLAYERS',))
+    assert worker_b.get('board') == 'cached'
+    before = worker_a.generations(['PLAYERS', '__epoch__'])
+    worker_b.invalidate('PLAYERS')
+    after = worker_a.generations(['PLAYERS', '__epoch__'])
+    assert after == {'PLAYERS': before['PLAYERS'] + 1, '__epoch__': before['__epoch__'] + 1}
+    assert worker_a.get('board') is None
+
+
+def test_clear_outdates_everything(directory):
+    cache = FileCache(directory)
+    cache.set('a', 1, ('TEAMS',))
+    cache.set('b', 2, ())
+    cache.clear()
+    assert cache.get('a') is None and cache.get('b') is None
+
+
+@pytest.mark.parametrize('make', [AggregateCache, FileCache])
+def test_value_computed_during_a_write_is_not_stored(make, directory):
+    cache = make() if make is AggregateCache else make(directory)
+    token = cache.token()
+    cache.invalidate('MATCH_RESULTS')  # lands while the value is being computed
+    cache.set('standings', 'stale', ('MATCH_RESULTS',), token)
+    assert cache.get('standings') is None
+    cache.set('standings', 'fresh', ('MATCH_RESULTS',), cache.token())
+    assert cache.get('standings') == 'fresh'
+
+
+def test_expired_and_discarded_entries_miss(directory):
+    cache = FileCache(directory, ttl=-1)
+    cache.set('old', 1, ())
+    assert cache.get('old') is None
+    cache = FileCache(directory)
+    cache.set('gone', 1, ())
+    cache.discard('gone')
+    assert cache.get('gone') is None
+
+
+def test_codec_round_trip(directory):
+    cache = FileCache(directory, encode=lambda v: sorted(v), decode=set)
+    cache.set('ids', {3, 1, 2}, ())
+    assert cache.get('ids') == {1, 2, 3}
+
+
+def test_corrupt_entry_is_a_miss(directory):
+    cache = FileCache(directory)
+    cache.set('page', 'html', ())
+    folder = os.path.join(directory, 'entries')
+    for name in os.listdir(folder):
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(b'\x80\x04not json')
+    assert cache.get('page') is None
+
+
+def test_refuses_a_directory_others_can_write(directory):
+    os.makedirs(directory)
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        FileCache(directory)
@@ -0,0 +1,140 @@
+import pytest
+
+from ingest import BallIngestor, ball_contribution
+
+
+class FakeDatabase:
+    """INGESTED_EVENTS, PLAYERS and PLAYER_STATS held in memory; counts connections and DDL."""
+
+    def __init__(self, players=(7, 31)):
+        self.players = set(players)
+        self.ingested = set()
+        self.stats = {}
+        self.connections = 0
+        self.ddl = 0
+
+    def connect(self):
+        self.connections += 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        if sql.lstrip().startswith("CREATE TABLE"):
+            self.db.ddl += 1
+        elif sql.startswith("SELECT event_id FROM INGESTED_EVENTS"):
+            self.rows = [(e,) for e in params if e in self.db.ingested]
+        elif sql.startswith("SELECT player_id FROM PLAYERS"):
+            self.rows = [(p,) for p in params if p in self.db.players]
+        elif sql.startswith("INSERT INTO INGESTED_EVENTS"):
+            self.db.ingested.update(params)
+        elif sql.startswith("INSERT INTO PLAYER_STATS"):
+            for i in range(0, len(params), 4):
+                totals = self.db.stats.setdefault(params[i], [0, 0, 0])
+                for j in range(3):
+                    totals[j] += params[i + 1 + j]
+
+    def fetchall(self):
+        return self.rows
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def ball(event_id, runs=1, wicket=False, dismissal=None):
+    return {'event_id': event_id, 'batter_id': 7, 'bowler_id': 31, 'runs': runs,
+            'wicket': wicket, 'dismissal': dismissal}
+
+
+def pairs(*events):
+    return list(enumerate(events, start=1))
+
+
+def test_ball_contribution():
+    assert ball_contribution(ball('a', runs=4)) == {7: (4, 0, 1)}
+    assert ball_contribution(ball('b', runs=0, wicket=True, dismissal='bowled')) == {7: (0, 0, 0), 31: (0, 1, 0)}
+    # Run outs aren't the bowler's wicket.
+    assert ball_contribution(ball('c', runs=0, wicket=True, dismissal='Run Out')) == {7: (0, 0, 0)}
+    for bad in ({'batter_id': 7, 'bowler_id': 31}, ball('x' * 65), ball('d', runs=-1), dict(ball('e'), batter_id='?')):
+        with pytest.raises(ValueError):
+            ball_contribution(bad)
+
+
+def test_event_id_is_the_idempotency_key():
+    db = FakeDatabase()
+    ingestor = BallIngestor(flush_size=100, flush_interval=0)
+    accepted, duplicates, errors, report = ingestor.add(pairs(ball('m1-0.1'), ball('m1-0.1'), ball('m1-0.2')), db.connect)
+    assert (accepted, duplicates, errors, report) == (2, 1, [], None)
+    assert ingestor.flush(db.connect).events == 2
+    # Replaying the same deliveries later adds nothing.
+    ingestor.add(pairs(ball('m1-0.1'), ball('m1-0.2')), db.connect)
+    report = ingestor.flush(db.connect)
+    assert (report.events, report.replayed) == (0, 2)
+    assert db.stats == {7: [2, 0, 0]}
+
+
+def test_events_for_unknown_players_stay_unrecorded():
+    db = FakeDatabase(players=(7,))
+    ingestor = BallIngestor(flush_interval=0)
+    ingestor.add(pairs(ball('m1-0.1', wicket=True, dismissal='bowled')), db.connect)
+    assert ingestor.flush(db.connect).unknown == 1
+    assert db.ingested == set() and db.stats == {}
+
+
+def test_size_threshold_flushes_with_the_callers_connection():
+    first, second = FakeDatabase(), FakeDatabase()
+    ingestor = BallIngestor(flush_size=3, flush_interval=0)
+    assert ingestor.add(pairs(ball('a'), ball('b')), first.connect)[3] is None
+    report = ingestor.add(pairs(ball('c')), second.connect)[3]
+    assert report.events == 3 and ingestor.buffered() == 0
+    assert (first.connections, second.connections) == (0, 1)
+
+
+def test_overdue_events_flush_on_the_next_add(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('ingest.time.monotonic', lambda: clock[0])
+    db = FakeDatabase()
+    ingestor = BallIngestor(flush_size=100, flush_interval=5)
+    assert ingestor.add(pairs(ball('a')), db.connect)[3] is None
+    clock[0] += 5
+    assert ingestor.add(pairs(ball('b')), db.connect)[3].events == 2
+    # No service account, so no timer thread holding on to a user's credentials.
+    assert ingestor._thread is None
+
+
+def test_buffer_limit_and_schema_callback():
+    db = FakeDatabase()
+    created = []
+    ingestor = BallIngestor(flush_size=100, flush_interval=0, max_buffer=2, on_schema=lambda: created.append(1))
+    accepted, _, errors, _ = ingestor.add(pairs(ball('a'), ball('b'), ball('c')), db.connect)
+    assert accepted == 2 and [line for line, _ in errors] == [3]
+    ingestor.flush(db.connect)
+    ingestor.add(pairs(ball('d')), db.connect)
+    ingestor.flush(db.connect)
+    assert db.ddl == 1 and created == [1]
+
+
+def test_failed_flush_keeps_the_batch():
+    db = FakeDatabase()
+    ingestor = BallIngestor(flush_interval=0)
+    ingestor.add(pairs(ball('a')), db.connect)
+
+    def broken():
+        raise RuntimeError("no database")
+    with pytest.raises(RuntimeError):
+        ingestor.flush(broken)
+    assert ingestor.buffered() == 1 and ingestor.totals['failed_flushes'] == 1
+    assert ingestor.flush(db.connect).events == 1
@@ -0,0 +1,41 @@
+import sqlite3
+
+from metrics import MAX_STATEMENT_LABELS, Histogram, Metrics, statement_label
+
+
+def test_statement_label_hides_literals():
+    sql = "SELECT * FROM USERS WHERE name = 'o''brien' AND pw = \"x\\\"y\" AND id = 42 AND t2.x = 1.5"
+    assert statement_label(sql) == "SELECT * FROM USERS WHERE name = ? AND pw = ? AND id = ? AND t2.x = ?"
+    assert statement_label("SELECT\n   1") == "SELECT ?"
+    assert len(statement_label("SELECT " + "a, " * 100)) == 120
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value)
+    lines = list(hist.lines('t', 'r="x"'))
+    assert lines[:3] == ['t_bucket{r="x",le="0.1"} 2', 't_bucket{r="x",le="1.0"} 3', 't_bucket{r="x",le="+Inf"} 4']
+    assert lines[-1] == 't_count{r="x"} 4'
+
+
+def test_statement_labels_are_capped():
+    metrics = Metrics()
+    for i in range(MAX_STATEMENT_LABELS + 5):
+        metrics.observe_statement(f"SELECT * FROM T{i}", 0.0)
+    assert len(metrics.statements) == MAX_STATEMENT_LABELS + 1
+    assert metrics.statements['other'].count == 5
+
+
+def test_instrumented_cursor_counts_rows_under_its_label():
+    metrics = Metrics(slow_query_seconds=60)
+    cursor = metrics.instrument(sqlite3.connect(':memory:').cursor())
+    cursor.execute("CREATE TABLE T (n INTEGER)")
+    cursor.executemany("INSERT INTO T VALUES (?)", [(i,) for i in range(5)])
+    cursor.label_as = "adhoc"
+    cursor.execute("SELECT n FROM T WHERE n > 1")
+    assert len(list(cursor)) == 3
+    assert metrics.statement_rows == {"INSERT INTO T VALUES (?)": 5, "adhoc": 3}
+    text = metrics.render({'pool_open': 2})
+    assert 'sql_statement_rows_total{statement="adhoc"} 3' in text
+    assert text.endswith('pool_open 2\n')
@@ -0,0 +1,103 @@
+import base64
+import json
+import sqlite3
+
+import pytest
+
+from paging import decode_token, encode_token, fetch_page, slice_page
+
+
+class SqliteCursor:
+    """mysql.connector-style (%s) placeholders over sqlite3, enough for fetch_page's queries."""
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), params)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE VENUES (venue_id INTEGER PRIMARY KEY, venue_name TEXT)")
+    # Gaps in the keys, as after deletes.
+    conn.executemany("INSERT INTO VENUES VALUES (?, ?)", [(i, f"Ground {i}") for i in range(2, 24, 2)])
+    return SqliteCursor(conn)
+
+
+def ids(page):
+    return [row[0] for row in page.rows]
+
+
+def test_tokens_round_trip():
+    for value in (0, 17, "P-01", None):
+        assert decode_token(encode_token(value)) == value
+    assert decode_token("") is None
+    assert '=' not in encode_token("padding?")
+
+
+def test_walk_forward_and_back(cursor):
+    first = fetch_page(cursor, 'VENUES', 'venue_id', 4)
+    assert ids(first) == [2, 4, 6, 8]
+    assert first.prev_token is None
+    second = fetch_page(cursor, 'VENUES', 'venue_id', 4, after=decode_token(first.next_token))
+    assert ids(second) == [10, 12, 14, 16]
+    last = fetch_page(cursor, 'VENUES', 'venue_id', 4, after=decode_token(second.next_token))
+    assert ids(last) == [18, 20, 22]
+    assert last.next_token is None
+    back = fetch_page(cursor, 'VENUES', 'venue_id', 4, before=decode_token(last.prev_token))
+    assert ids(back) == ids(second)
+    assert back.next_token and back.prev_token
+    start = fetch_page(cursor, 'VENUES', 'venue_id', 4, before=decode_token(back.prev_token))
+    assert ids(start) == ids(first)
+    assert start.prev_token is None
+
+
+def test_exact_multiple_has_no_empty_last_page(cursor):
+    page = fetch_page(cursor, 'VENUES', 'venue_id', 11)
+    assert len(page.rows) == 11
+    assert page.next_token is None
+
+
+def test_token_after_deleted_key_still_resumes(cursor):
+    # Keyset tokens carry the key, not an offset, so a missing key is fine.
+    page = fetch_page(cursor, 'VENUES', 'venue_id', 3, after=5)
+    assert ids(page) == [6, 8, 10]
+
+
+def test_empty_table(cursor):
+    cursor.execute("DELETE FROM VENUES")
+    page = fetch_page(cursor, 'VENUES', 'venue_id', 5)
+    assert page.rows == [] and page.next_token is None and page.prev_token is None
+
+
+def test_slice_page_offsets():
+    rows = [(i,) for i in range(10)]
+    first = slice_page(['n'], rows, 4)
+    second = slice_page(['n'], rows, 4, after=decode_token(first.next_token))
+    assert ids(second) == [4, 5, 6, 7]
+    back = slice_page(['n'], rows, 4, before=decode_token(second.prev_token))
+    assert ids(back) == [0, 1, 2, 3]
+    # Junk offsets from a hand-edited URL fall back to the start.
+    assert ids(slice_page(['n'], rows, 2, after="x")) == [0, 1]
+
+
+@pytest.mark.parametrize('value', [{'a': 1}, [], [1, 2], [[1]], [{'a': 1}], "x"])
+def test_tokens_that_are_not_ours_are_rejected(value):
+    token = base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+    with pytest.raises(ValueError):
+        decode_token(token)
+
+
+@pytest.mark.parametrize('token', ['eyJhIjoxfQ', '!!!', 'bm90IGpzb24'])
+def test_garbage_tokens_raise_value_error(token):
+    with pytest.raises(ValueError):
+        decode_token(token)
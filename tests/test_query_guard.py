@@ -0,0 +1,38 @@
+from query_guard import estimate_rows, is_select, with_time_limit
+from schema import is_ddl, is_read_only
+
+
+def test_read_only_classifier():
+    for sql in ("SELECT * FROM TEAMS", "  show tables;", "DESC PLAYERS", "EXPLAIN SELECT 1",
+                "SELECT 'a;b' FROM TEAMS;", "SELECT `odd;name` FROM T"):
+        assert is_read_only(sql), sql
+    for sql in ("DELETE FROM TEAMS", "SELECT 1; DELETE FROM TEAMS", "UPDATE T SET a = 'select'"):
+        assert not is_read_only(sql), sql
+
+
+def test_is_select_and_ddl():
+    assert is_select("  select 1") and not is_select("EXPLAIN SELECT 1")
+    assert is_ddl("drop table x") and not is_ddl("SELECT 'drop'")
+
+
+def test_time_limit_hint_goes_after_the_first_select():
+    assert with_time_limit("SELECT * FROM (SELECT 1) t", 2500) == \
+        "SELECT /*+ MAX_EXECUTION_TIME(2500) */ * FROM (SELECT 1) t"
+    assert with_time_limit("SHOW TABLES", 10) == "SHOW TABLES"
+
+
+class ExplainCursor:
+    def __init__(self, rows, columns=('id', 'table', 'rows', 'filtered')):
+        self.rows, self.description = rows, [(c,) for c in columns]
+
+    def execute(self, sql):
+        self.sql = sql
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_estimate_multiplies_rows_times_filtered_per_table():
+    cursor = ExplainCursor([(1, 'a', 1000, 10.0), (1, 'b', 50, 100.0)])
+    assert estimate_rows(cursor, "SELECT * FROM a JOIN b") == 1000 * 0.1 * 50
+    assert cursor.sql == "EXPLAIN SELECT * FROM a JOIN b"
@@ -0,0 +1,76 @@
+import mysql.connector
+import pytest
+
+from routing import ER_SPECIFIC_ACCESS_DENIED, ReplicaRouter, parse_address, parse_addresses, replica_lag
+
+R1, R2 = ('r1', 3306), ('r2', 3307)
+
+
+def router(**kwargs):
+    kwargs.setdefault('check_interval', 0)
+    return ReplicaRouter([R1, R2], max_lag=5, **kwargs)
+
+
+def test_parse_addresses():
+    assert parse_address('db2:3307') == ('db2', 3307)
+    assert parse_address(' db2 ') == ('db2', 3306)
+    assert parse_addresses('a:1, b,') == [('a', 1), ('b', 3306)]
+    assert parse_addresses(None) == []
+
+
+def test_round_robin_over_healthy_replicas():
+    r = router()
+    picks = [r.read_target(lambda a: 0.0) for _ in range(4)]
+    assert picks == [R1, R2, R1, R2]
+
+
+@pytest.mark.parametrize('lag', [None, 6.0, float('inf')])
+def test_lagging_or_unmeasurable_replicas_fall_back_to_the_primary(lag):
+    r = router()
+    assert r.read_target(lambda a: lag) is None
+    assert r.status()['fallbacks_to_primary'] == 1
+
+
+def test_down_replica_is_skipped_until_backoff_ends():
+    r = router(down_backoff=60)
+
+    def probe(address):
+        if address == R1:
+            raise mysql.connector.Error("refused")
+        return 0.0
+    assert r.read_target(probe) == R2
+    assert r.read_target(lambda a: 0.0) == R2  # R1 is still backing off
+    assert [s['down'] for s in r.status()['replicas']] == [True, False]
+
+
+def test_no_replicas_means_primary():
+    assert ReplicaRouter([]).read_target(lambda a: 0.0) is None
+
+
+class StatusCursor:
+    def __init__(self, rows, columns=('Seconds_Behind_Source',), fail=None):
+        self.rows, self.description, self.fail = rows, [(c,) for c in columns], fail
+        self.statements = []
+
+    def execute(self, sql):
+        self.statements.append(sql)
+        if self.fail and sql in self.fail:
+            raise self.fail[sql]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_replica_lag():
+    assert replica_lag(StatusCursor([(3,)])) == 3.0
+    assert replica_lag(StatusCursor([(None,)])) == float('inf')  # replication stopped
+    assert replica_lag(StatusCursor([])) is None  # not a replica
+    denied = mysql.connector.Error(errno=ER_SPECIFIC_ACCESS_DENIED)
+    assert replica_lag(StatusCursor([(0,)], fail={"SHOW REPLICA STATUS;": denied})) is None
+
+
+def test_replica_lag_falls_back_to_show_slave_status():
+    old = StatusCursor([(2,)], columns=('Seconds_Behind_Master',),
+                       fail={"SHOW REPLICA STATUS;": mysql.connector.Error(errno=1064)})
+    assert replica_lag(old) == 2.0
+    assert old.statements == ["SHOW REPLICA STATUS;", "SHOW SLAVE STATUS;"]
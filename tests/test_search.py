@@ -0,0 +1,67 @@
+from search import SearchIndex, normalize
+
+TABLES = {
+    "PLAYERS": [(1, "Virat Kohli"), (2, "Rohit Sharma"), (3, "Kane Williamson"), (4, "José Butler")],
+    "TEAMS": [(1, "Royal Challengers", "Andy Flower"), (2, "Mumbai Indians", None)],
+    "VENUES": [(1, "Wankhede Stadium", "Mumbai")],
+}
+
+
+class FakeConnection:
+    def __init__(self, tables, loads):
+        self.tables, self.loads = tables, loads
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        table = sql.split(" FROM ")[1].rstrip(';')
+        self.loads.append(table)
+        self.rows = self.tables[table]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def index(loads=None):
+    loads = [] if loads is None else loads
+    idx = SearchIndex()
+    idx.ensure(lambda: FakeConnection(TABLES, loads))
+    return idx
+
+
+def hits(results):
+    return [(r['table'], r['id']) for r in results]
+
+
+def test_normalize_folds_case_accents_and_spaces():
+    assert normalize("  José   BUTLER ") == "jose butler"
+
+
+def test_prefix_search_across_tables():
+    assert set(hits(index().search("mum"))) == {("TEAMS", 2), ("VENUES", 1)}
+    assert hits(index().search("koh")) == [("PLAYERS", 1)]
+    assert hits(index().search("jose", tables={"PLAYERS"})) == [("PLAYERS", 4)]
+
+
+def test_exact_name_ranks_first_and_typos_still_match():
+    idx = index()
+    assert hits(idx.search("Rohit Sharma"))[0] == ("PLAYERS", 2)
+    assert ("PLAYERS", 3) in hits(idx.search("wiliamson"))
+
+
+def test_only_stale_tables_are_reloaded():
+    loads = []
+    idx = index(loads)
+    assert sorted(loads) == ["PLAYERS", "TEAMS", "VENUES"]
+    idx.ensure(lambda: FakeConnection(TABLES, loads))
+    assert len(loads) == 3
+    changed = dict(TABLES, PLAYERS=[(1, "Virat Kohli"), (5, "Shubman Gill")])
+    idx.invalidate("players")
+    idx.ensure(lambda: FakeConnection(changed, loads))
+    assert loads[3:] == ["PLAYERS"]
+    assert hits(idx.search("gill")) == [("PLAYERS", 5)]
+    assert ("PLAYERS", 2) not in hits(idx.search("rohit"))
@@ -0,0 +1,119 @@
+import re
+
+from standings import TeamDelta, apply_result_changes, overs_to_balls, result_deltas
+
+HOME, AWAY = 1, 2
+
+# match_id -> (home_team_id, away_team_id)
+MATCHES = {10: (1, 2), 11: (3, 4), 12: (1, 3)}
+
+
+class FakeCursor:
+    """Answers the MATCHES lookup and records STANDINGS upserts as {team_id: TeamDelta}."""
+
+    def __init__(self, upserts):
+        self.upserts = upserts
+        self.row = None
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT home_team_id, away_team_id FROM MATCHES"):
+            self.row = MATCHES.get(params[0])
+        elif sql.startswith("INSERT INTO STANDINGS"):
+            fields = re.search(r"\(team_id, ([^)]*)\)", sql).group(1).split(", ")
+            values = dict(zip(fields, params[1:]))
+            self.upserts[params[0]] = TeamDelta(**{f: values.get(f, 0) for f in TeamDelta._fields})
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.upserts = {}
+
+    def cursor(self):
+        return FakeCursor(self.upserts)
+
+
+def apply(changes):
+    conn = FakeConnection()
+    apply_result_changes(conn, changes)
+    return conn.upserts
+
+
+def result(match_id, winner):
+    return {'result_id': 1, 'match_id': match_id, 'winner_team_id': winner}
+
+
+def counts(delta):
+    return (delta.matches_played, delta.wins, delta.losses, delta.ties, delta.points)
+
+
+def test_win_gives_the_winner_two_points():
+    deltas = result_deltas(HOME, AWAY, result(10, HOME))
+    assert counts(deltas[HOME]) == (1, 1, 0, 0, 2)
+    assert counts(deltas[AWAY]) == (1, 0, 1, 0, 0)
+
+
+def test_missing_winner_counts_as_a_tie_for_both_sides():
+    # MATCH_RESULTS has no separate "no result" marker: a NULL (or blank form) winner is a tie.
+    for winner in (None, ""):
+        deltas = result_deltas(HOME, AWAY, result(10, winner))
+        assert counts(deltas[HOME]) == counts(deltas[AWAY]) == (1, 0, 0, 1, 1)
+
+
+def test_winner_from_a_form_is_a_string():
+    deltas = result_deltas(HOME, AWAY, result(10, "2"))
+    assert counts(deltas[AWAY]) == (1, 1, 0, 0, 2)
+
+
+def test_nrr_totals_use_balls():
+    row = dict(result(10, HOME), home_runs=180, home_overs="20", away_runs=150, away_overs="19.4")
+    home = result_deltas(HOME, AWAY, row, track_nrr=True)[HOME]
+    assert (home.runs_for, home.balls_faced, home.runs_against, home.balls_bowled) == (180, 120, 150, 118)
+    assert overs_to_balls(None) == overs_to_balls("") == 0
+
+
+def test_insert_adds_both_teams():
+    upserts = apply([(None, result(10, HOME))])
+    assert counts(upserts[1]) == (1, 1, 0, 0, 2)
+    assert counts(upserts[2]) == (1, 0, 1, 0, 0)
+
+
+def test_update_of_the_winner_moves_points_only():
+    upserts = apply([(result(10, HOME), result(10, AWAY))])
+    assert counts(upserts[1]) == (0, -1, 1, 0, -2)
+    assert counts(upserts[2]) == (0, 1, -1, 0, 2)
+
+
+def test_update_from_win_to_tie():
+    upserts = apply([(result(10, HOME), result(10, None))])
+    assert counts(upserts[1]) == (0, -1, 0, 1, -1)
+    assert counts(upserts[2]) == (0, 0, -1, 1, 1)
+
+
+def test_update_with_a_changed_match_id_moves_the_result_between_matches():
+    upserts = apply([(result(10, 1), result(12, 1))])
+    # Team 1 plays both matches and wins both: no net change, so no write.
+    assert 1 not in upserts
+    assert counts(upserts[2]) == (-1, 0, -1, 0, 0)
+    assert counts(upserts[3]) == (1, 0, 1, 0, 0)
+
+
+def test_unchanged_update_writes_nothing():
+    assert apply([(result(10, HOME), result(10, HOME))]) == {}
+
+
+def test_batch_delete_sums_per_team():
+    upserts = apply([(result(10, 1), None), (result(12, 3), None), (result(11, None), None)])
+    assert counts(upserts[1]) == (-2, -1, -1, 0, -2)
+    assert counts(upserts[2]) == (-1, 0, -1, 0, 0)
+    assert counts(upserts[3]) == (-2, -1, 0, -1, -3)
+    assert counts(upserts[4]) == (-1, 0, 0, -1, -1)
+
+
+def test_rows_for_unknown_matches_are_skipped():
+    assert apply([(None, result(99, 1)), (None, result(None, 1))]) == {}
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from paging import decode_token
+from views import VIEW_KEYS, VIEW_QUERIES, fetch_view_page
+
+
+class SqliteCursor:
+    """mysql.connector-style (%s) placeholders over sqlite3."""
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), params)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE TEAMS (team_id INTEGER PRIMARY KEY, team_name TEXT, coach_name TEXT, home_city TEXT)")
+    conn.execute("CREATE TABLE PLAYERS (player_id INTEGER PRIMARY KEY, player_name TEXT, DOB TEXT, role TEXT,"
+                 " batting_style TEXT, bowling_style TEXT, team_id INTEGER)")
+    conn.executemany("INSERT INTO TEAMS VALUES (?, ?, ?, ?)", [(t, f"Team {t}", "Coach", "City") for t in (1, 2)])
+    conn.executemany("INSERT INTO PLAYERS VALUES (?, ?, '2000-01-01', 'Batsman', 'R', 'R', ?)",
+                     [(p, f"Player {p}", 1 + p % 2) for p in range(1, 8)])
+    return SqliteCursor(conn)
+
+
+def test_large_views_page_by_the_driving_key(cursor):
+    first = fetch_view_page(cursor, 'players', 3)
+    assert first.columns == ['Player', 'DOB', 'Role', 'Batting', 'Bowling', 'Team']
+    assert [r[0] for r in first.rows] == ['Player 1', 'Player 2', 'Player 3']
+    second = fetch_view_page(cursor, 'PLAYERS', 3, after=decode_token(first.next_token))
+    assert [r[0] for r in second.rows] == ['Player 4', 'Player 5', 'Player 6']
+    back = fetch_view_page(cursor, 'PLAYERS', 3, before=decode_token(second.prev_token))
+    assert back.rows == first.rows
+
+
+def test_views_without_a_key_are_not_paged(cursor):
+    assert fetch_view_page(cursor, 'STANDINGS', 3) is None
+    assert set(VIEW_KEYS) < set(VIEW_QUERIES)
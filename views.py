@@ -0,0 +1,206 @@
+import re
+import threading
+import time
+
+from paging import fetch_page
+
+# Joined / formatted queries behind /viewdb/<table>, keyed by upper-case table name.
+VIEW_QUERIES = {
+    "STANDINGS": """
+        SELECT 
+            ROW_NUMBER() OVER (ORDER BY S.points DESC, S.net_run_rate DESC) AS 'Rank',
+            T.team_name AS 'Team',
+            S.matches_played AS 'Matches Played',
+            S.wins AS 'Wins',
+            S.losses AS 'Losses',
+            S.ties AS 'Ties',
+            S.points AS 'Points',
+            S.net_run_rate AS 'Net Run Rate'
+        FROM STANDINGS S
+        JOIN TEAMS T ON S.team_id = T.team_id
+        ORDER BY S.points DESC, S.net_run_rate DESC;
+    """,
+
+    "PLAYER_STATS": """
+        SELECT 
+            P.player_name AS 'Player',
+            P.role AS 'Role',
+            PS.runs_scored AS 'Runs',
+            PS.wickets_taken AS 'Wickets',
+            PS.boundaries AS 'Boundaries',
+            T.team_name AS 'Team'
+        FROM PLAYER_STATS PS
+        JOIN PLAYERS P ON PS.player_id = P.player_id
+        JOIN TEAMS T ON P.team_id = T.team_id
+        ORDER BY Runs DESC;
+    """,
+
+    "MATCH_RESULTS": """
+        SELECT 
+            MR.result_id AS 'Result ID',
+            M.match_id AS 'Match ID',
+            H.team_name AS 'Home Team',
+            A.team_name AS 'Away Team',
+            W.team_name AS 'Winner',
+            P.player_name AS 'Man of the Match'
+        FROM MATCH_RESULTS MR
+        JOIN MATCHES M ON MR.match_id = M.match_id
+        JOIN TEAMS H ON M.home_team_id = H.team_id
+        JOIN TEAMS A ON M.away_team_id = A.team_id
+        LEFT JOIN TEAMS W ON MR.winner_team_id = W.team_id
+        JOIN PLAYERS P ON MR.man_of_the_match = P.player_id;
+    """,
+
+    "MATCHES": """
+        SELECT 
+            M.match_id AS 'Match ID',
+            H.team_name AS 'Home Team',
+            A.team_name AS 'Away Team',
+            M.status AS 'Status',
+            M.match_type AS 'Type',
+            M.match_date AS 'Date',
+            V.venue_name AS 'Venue'
+        FROM MATCHES M
+        JOIN TEAMS H ON M.home_team_id = H.team_id
+        JOIN TEAMS A ON M.away_team_id = A.team_id
+        JOIN VENUES V ON M.venue_id = V.venue_id
+        ORDER BY M.match_date;
+    """,
+
+    "PLAYERS_CONTACTS": """
+        SELECT 
+            P.player_name AS 'Player',
+            PC.contact_no AS 'Contact',
+            T.team_name AS 'Team'
+        FROM PLAYERS_CONTACTS PC
+        JOIN PLAYERS P ON PC.player_id = P.player_id
+        JOIN TEAMS T ON P.team_id = T.team_id;
+    """,
+
+    "PLAYERS": """
+        SELECT player_name AS 'Player', DOB, role AS 'Role', batting_style AS 'Batting', bowling_style AS 'Bowling', T.team_name AS 'Team'
+        FROM PLAYERS P
+        JOIN TEAMS T ON P.team_id = T.team_id;
+    """,
+
+    "TEAMS": """
+        SELECT team_name AS 'Team', coach_name AS 'Coach', home_city AS 'City'
+        FROM TEAMS;
+    """,
+
+    "VENUES": """
+        SELECT venue_name AS 'Venue', city AS 'City', capacity AS 'Capacity'
+        FROM VENUES;
+    """
+}
+
+# Source tables each joined view reads; a write to any of them makes the view stale.
+VIEW_SOURCES = {
+    "STANDINGS": ("STANDINGS", "TEAMS"),
+    "PLAYER_STATS": ("PLAYER_STATS", "PLAYERS", "TEAMS"),
+    "MATCH_RESULTS": ("MATCH_RESULTS", "MATCHES", "TEAMS", "PLAYERS"),
+    "MATCHES": ("MATCHES", "TEAMS", "VENUES"),
+    "PLAYERS_CONTACTS": ("PLAYERS_CONTACTS", "PLAYERS", "TEAMS"),
+    "PLAYERS": ("PLAYERS", "TEAMS"),
+    "TEAMS": ("TEAMS",),
+    "VENUES": ("VENUES",),
+}
+
+# Unique key of each view's driving table, for keyset pages once a view is too
+# large to materialize. STANDINGS (ranked by a window function) and
+# PLAYERS_CONTACTS (composite key) have none and are streamed instead.
+VIEW_KEYS = {
+    "PLAYER_STATS": "PS.player_id",
+    "MATCH_RESULTS": "MR.result_id",
+    "MATCHES": "M.match_id",
+    "PLAYERS": "P.player_id",
+    "TEAMS": "team_id",
+    "VENUES": "venue_id",
+}
+
+PAGE_KEY = "page_key"
+
+
+def fetch_view_page(cursor, view, size, after=None, before=None):
+    """One keyset page of a joined view, ordered by its VIEW_KEYS column.
+
+    The view's query becomes a derived table with the key selected as
+    ``page_key``; MySQL merges it into the outer query, so the key range and
+    LIMIT reach the driving table's primary key index. ``page_key`` is dropped
+    from the returned rows. Returns None for views without a key.
+    """
+    view = view.upper()
+    key = VIEW_KEYS.get(view)
+    if key is None:
+        return None
+    body = re.sub(r"\s+ORDER BY [^()]*$", "", VIEW_QUERIES[view].strip().rstrip(';'))
+    body = re.sub(r"^\s*SELECT\b", f"SELECT {key} AS {PAGE_KEY},", body)
+    page = fetch_page(cursor, f"({body}) AS {view}_PAGE", PAGE_KEY, size, after, before)
+    drop = page.columns.index(PAGE_KEY)
+    return page._replace(columns=[c for i, c in enumerate(page.columns) if i != drop],
+                         rows=[row[:drop] + row[drop + 1:] for row in page.rows])
+
+
+class ViewStore:
+    """Materialized in-memory snapshots of the VIEW_QUERIES joins.
+
+    A snapshot is rebuilt only when one of its VIEW_SOURCES tables was written
+    since it was taken (or after ``max_age`` seconds, for writes made outside
+    the app). Views with more than ``max_rows`` rows are not materialized and
+    ``get`` returns None so the caller can stream them instead. Snapshots are
+    kept per MySQL user because grants decide what a user may read.
+    """
+
+    def __init__(self, max_rows=20000, max_age=300):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._snapshots = {}  # (user, view) -> (taken_at, columns, rows or None)
+        self._versions = {}   # view -> bumped on every invalidation
+
+    def get(self, conn, user, view):
+        view = view.upper()
+        key = (user, view)
+        with self._lock:
+            entry = self._snapshots.get(key)
+            version = self._versions.get(view, 0)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            entry = (time.monotonic(),) + self._materialize(conn, view)
+            with self._lock:
+                # Drop the result if a write invalidated the view while we were reading it.
+                if self._versions.get(view, 0) == version:
+                    self._snapshots[key] = entry
+        if entry[2] is None:
+            return None
+        return entry[1], entry[2]
+
+    def _materialize(self, conn, view):
+        cursor = conn.cursor()
+        cursor.execute(VIEW_QUERIES[view])
+        columns = [d[0] for d in cursor.description]
+        rows = []
+        while True:
+            batch = cursor.fetchmany(1000)
+            if not batch:
+                break
+            rows.extend(batch)
+            if len(rows) > self.max_rows:
+                rows = None
+                break
+        cursor.close()
+        return columns, rows
+
+    def invalidate(self, table_name):
+        table_name = table_name.upper()
+        stale = {view for view, sources in VIEW_SOURCES.items() if table_name in sources}
+        with self._lock:
+            for view in stale:
+                self._versions[view] = self._versions.get(view, 0) + 1
+            for key in [k for k in self._snapshots if k[1] in stale]:
+                del self._snapshots[key]
+
+    def clear(self):
+        with self._lock:
+            for view in VIEW_QUERIES:
+                self._versions[view] = self._versions.get(view, 0) + 1
+            self._snapshots.clear()